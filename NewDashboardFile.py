@@ -1,34 +1,50 @@
+import time
+_import_started = time.perf_counter()
+
+import collections
+import functools
+import json
+import logging
+import math
+import os
+
 import dash
-from dash import dcc, html
-import plotly.express as px
-import pandas as pd
-from statsmodels.stats.proportion import proportions_ztest
+import flask
+from dash import ClientsideFunction, Patch, dcc, html
+
+import aggregate_api
+from data_snapshot import SnapshotManager
+from figure_cache import DEFAULT_CACHE_DIR, FIGURE_CODE_FILES, FigureCache, code_version
+from instrumentation import metrics, stage
+
+logger = logging.getLogger(__name__)
 
 # =========================
 # Load Data
 # =========================
-density_map_data = pd.read_csv("DensityMapDataV3.csv")
-top_ai_skills_data = pd.read_csv("TopAISkillsChartDataV2_with_other.csv")
-top_ai_career_data = pd.read_csv("TopAICareerDataV2_with_other.csv")
-
-state_abbrev = {
-    "Alabama": "AL","Alaska": "AK","Arizona": "AZ","Arkansas": "AR","California": "CA",
-    "Colorado": "CO","Connecticut": "CT","Delaware": "DE","Florida": "FL","Georgia": "GA",
-    "Hawaii": "HI","Idaho": "ID","Illinois": "IL","Indiana": "IN","Iowa": "IA",
-    "Kansas": "KS","Kentucky": "KY","Louisiana": "LA","Maine": "ME","Maryland": "MD",
-    "Massachusetts": "MA","Michigan": "MI","Minnesota": "MN","Mississippi": "MS",
-    "Missouri": "MO","Montana": "MT","Nebraska": "NE","Nevada": "NV","New Hampshire": "NH",
-    "New Jersey": "NJ","New Mexico": "NM","New York": "NY","North Carolina": "NC",
-    "North Dakota": "ND","Ohio": "OH","Oklahoma": "OK","Oregon": "OR","Pennsylvania": "PA",
-    "Rhode Island": "RI","South Carolina": "SC","South Dakota": "SD","Tennessee": "TN",
-    "Texas": "TX","Utah": "UT","Vermont": "VT","Virginia": "VA","Washington": "WA",
-    "West Virginia": "WV","Wisconsin": "WI","Wyoming": "WY","Washington, D.C.": "DC"
-}
-if "state_abbrev" not in density_map_data.columns:
-    density_map_data["state_abbrev"] = density_map_data["state_name"].map(state_abbrev)
+# Tables and derived indexes live in a versioned snapshot. Source files are polled
+# every DASHBOARD_RELOAD_INTERVAL seconds (0 disables) and a changed snapshot is
+# rebuilt in the background and swapped in atomically; no worker restart needed.
+# Tables come from the memory-mapped bundle when fresh (see data_bundle.py), CSV otherwise.
+# Nothing is read (and pandas is not even imported) until create_app() or the first callback.
+snapshots = SnapshotManager(interval=float(os.environ.get("DASHBOARD_RELOAD_INTERVAL", "30")))
+
+# Figure cache: per-worker LRU in front of a disk tier shared by all gunicorn workers.
+# Keys carry the snapshot version and a hash of the modules below, so a deploy never
+# serves figures built by the previous code. Set DASHBOARD_CACHE_DIR="" to keep it
+# in-process only. Identical concurrent misses are computed once per node
+# (in-process, plus a lock file per key).
+figure_cache = FigureCache(
+    lambda: snapshots.current().version,
+    maxsize=int(os.environ.get("DASHBOARD_CACHE_SIZE", "256")),
+    cache_dir=os.environ.get("DASHBOARD_CACHE_DIR", DEFAULT_CACHE_DIR),
+    code_version=code_version(FIGURE_CODE_FILES),
+)
+
+# DASHBOARD_CLIENTSIDE_DENSITY=1 ships the year cube to the browser once and redraws
+# the density map there, so slider drags never reach the server.
+CLIENTSIDE_DENSITY = os.environ.get("DASHBOARD_CLIENTSIDE_DENSITY", "0") == "1"
 
-# If ai_jobs_us_total_year isn't present, we can always derive totals per year.
-# (We won't rely on summing this column across states to avoid double-counting.)
 # Colors / Style
 orange = "#FF8200"
 gray = "#4B4B4B"
@@ -36,51 +52,71 @@ light_gray = "#d3d3d3"
 dark_gray = "#2f2f2f"
 green = "#2EB67D"
 
+# Initial selection of the multi-state comparison charts
+DEFAULT_MULTI_STATES = ["California", "Tennessee", "Texas", "New York", "Washington"]
+
+# Seconds spent in each startup phase; logged by create_app() and exported at /metrics
+STARTUP_SECONDS = {}
+
+def per_snapshot(func):
+    """Cache ``func()`` for the current snapshot; only the live snapshot's value is kept."""
+    cached = (None, None)  # (version, value), replaced in one assignment so threads never see half an update
+
+    @functools.wraps(func)
+    def wrapper():
+        nonlocal cached
+        version = snapshots.current().version
+        cached_version, value = cached
+        if cached_version != version:
+            value = func()
+            cached = (version, value)
+        return value
+    return wrapper
+
 # =========================
 # Dash App
 # =========================
-app = dash.Dash(
-    __name__,
-    suppress_callback_exceptions=True,
-    external_stylesheets=["https://fonts.googleapis.com/css2?family=Montserrat&display=swap"]
-)
-
-app.layout = html.Div([
-    dcc.Tabs(
-        id="tabs",
-        value="tab1",
-        children=[
-            dcc.Tab(label="AI Job Density Across States", value="tab1"),
-            dcc.Tab(label="AI Across Career Areas Comparison", value="tab2"),
-            dcc.Tab(label="Top AI Skills In Each State", value="tab3"),
-        ],
-        style={
-            "fontFamily": "Gotham, sans-serif",
-            "color": orange,
-            "backgroundColor": dark_gray,
-        },
-        colors={
-            "border": gray,
-            "primary": orange,
-            "background": dark_gray
-        }
-    ),
-    html.Div(id="tabs-content")
-], style={"backgroundColor": gray, "padding": "20px", "fontFamily": "Gotham, sans-serif"})
+def serve_layout():
+    # The store carries the year cube when the density map is recomputed in the browser
+    density_store = dcc.Store(id="density_store", data=density_client_payload() if CLIENTSIDE_DENSITY else None)
+    return html.Div([
+        dcc.Tabs(
+            id="tabs",
+            value="tab1",
+            children=[
+                dcc.Tab(label="AI Job Density Across States", value="tab1"),
+                dcc.Tab(label="AI Across Career Areas Comparison", value="tab2"),
+                dcc.Tab(label="Top AI Skills In Each State", value="tab3"),
+            ],
+            style={
+                "fontFamily": "Gotham, sans-serif",
+                "color": orange,
+                "backgroundColor": dark_gray,
+            },
+            colors={
+                "border": gray,
+                "primary": orange,
+                "background": dark_gray
+            }
+        ),
+        html.Div(id="tabs-content"),
+        density_store
+    ], style={"backgroundColor": gray, "padding": "20px", "fontFamily": "Gotham, sans-serif"})
 
 # =========================
 # Tab router
 # =========================
-@app.callback(
-    dash.Output("tabs-content", "children"),
-    dash.Input("tabs", "value")
-)
-def render_content(tab):
-    if tab == "tab1":
-        years_sorted = sorted(density_map_data["year"].dropna().unique())
-        default_range = [int(years_sorted[0]), int(years_sorted[-1])] if years_sorted else [0, 0]
-
-        return html.Div([
+@per_snapshot
+def tab_layouts():
+    """Every tab's components, built once per snapshot; switching tabs just returns one."""
+    snap = snapshots.current()
+    years_sorted = [int(y) for y in snap.density_cube.years]
+    default_range = [years_sorted[0], years_sorted[-1]] if years_sorted else [0, 0]
+    career_states = [{"label": s, "value": s} for s in snap.top_ai_career_data["state_name"].unique()]
+    skills_states = [{"label": s, "value": s} for s in snap.top_ai_skills_data["state_name"].unique()]
+
+    return {
+        "tab1": html.Div([
             html.Div([
                 html.Label("Metric:", style={"color": "#ffffff", "marginBottom": "6px"}),
                 dcc.RadioItems(
@@ -98,161 +134,351 @@ def render_content(tab):
                 html.Label("Year Range:", style={"color": "#ffffff", "marginBottom": "6px"}),
                 dcc.RangeSlider(
                     id="density_years",
-                    min=int(years_sorted[0]) if years_sorted else 0,
-                    max=int(years_sorted[-1]) if years_sorted else 0,
+                    min=default_range[0],
+                    max=default_range[1],
                     step=1,
                     value=default_range,
-                    marks={int(y): str(int(y)) for y in years_sorted},
+                    marks={y: str(y) for y in years_sorted},
                     tooltip={"placement": "bottom", "always_visible": True},
                     allowCross=False
                 )
             ], style={"marginBottom": "20px"}),
 
-            dcc.Graph(id="density_map")
-        ])
+            dcc.Graph(id="density_map", figure=density_template()),
+            *region_drilldown(snap)
+        ]),
 
-    elif tab == "tab2":
-        return html.Div([
+        "tab2": html.Div([
             html.Label("Select State 1:", style={"color": "#ffffff"}),
             dcc.Dropdown(
                 id="career_state_1",
-                options=[{"label": s, "value": s} for s in top_ai_career_data["state_name"].unique()],
+                options=career_states,
                 value="California",
                 clearable=False
             ),
             html.Label("Select State 2:", style={"color": "#ffffff"}),
             dcc.Dropdown(
                 id="career_state_2",
-                options=[{"label": s, "value": s} for s in top_ai_career_data["state_name"].unique()],
+                options=career_states,
                 value="Tennessee",
                 clearable=False
             ),
-            dcc.Graph(id="career_comparison_chart")
-        ])
+            similar_states_controls("career"),
+            dcc.Graph(id="career_comparison_chart", figure=comparison_template("career")),
+            html.Label("Compare several states:", style={"color": "#ffffff"}),
+            dcc.Dropdown(
+                id="career_states_multi",
+                options=career_states,
+                value=DEFAULT_MULTI_STATES,
+                multi=True
+            ),
+            dcc.Graph(id="career_multi_chart", figure=multi_comparison_template("career"))
+        ]),
 
-    elif tab == "tab3":
-        return html.Div([
+        "tab3": html.Div([
             html.Label("Select State 1:", style={"color": "#ffffff"}),
             dcc.Dropdown(
                 id="skills_state_1",
-                options=[{"label": s, "value": s} for s in top_ai_skills_data["state_name"].unique()],
+                options=skills_states,
                 value="California",
                 clearable=False
             ),
             html.Label("Select State 2:", style={"color": "#ffffff"}),
             dcc.Dropdown(
                 id="skills_state_2",
-                options=[{"label": s, "value": s} for s in top_ai_skills_data["state_name"].unique()],
+                options=skills_states,
                 value="Tennessee",
                 clearable=False
             ),
-            dcc.Graph(id="skills_comparison_chart")
-        ])
+            similar_states_controls("skills"),
+            dcc.Graph(id="skills_comparison_chart", figure=comparison_template("skills")),
+            html.Label("Compare several states:", style={"color": "#ffffff"}),
+            dcc.Dropdown(
+                id="skills_states_multi",
+                options=skills_states,
+                value=DEFAULT_MULTI_STATES,
+                multi=True
+            ),
+            dcc.Graph(id="skills_multi_chart", figure=multi_comparison_template("skills"))
+        ]),
+    }
+
+@dash.callback(
+    dash.Output("tabs-content", "children"),
+    dash.Input("tabs", "value")
+)
+@metrics.instrument("render_content")
+def render_content(tab):
+    return tab_layouts().get(tab)
 
 # =========================
 # Density map callback (multi-year)
 # =========================
-@app.callback(
-    dash.Output("density_map", "figure"),
-    [dash.Input("density_metric", "value"),
-     dash.Input("density_years", "value")]
-)
-def update_density_map(metric, years_range):
-    if not years_range or len(years_range) != 2:
-        # Fallback empty fig
-        fig = px.choropleth(locations=[], locationmode="USA-states", scope="usa", color=[])
-        fig.update_layout(
-            title_text="No year range selected",
-            plot_bgcolor=light_gray, paper_bgcolor=gray,
-            font=dict(color="white", family="Gotham, sans-serif")
+def density_labels(metric, period, area="state"):
+    """Colorbar title and hover template for a metric; ``period`` is the year-range text."""
+    if metric == "state_share":
+        return f"AI share within {area}", (
+            "<b>%{customdata[0]}</b> — " + period + "<br>"
+            "AI jobs (sum): %{customdata[1]:,}<br>"
+            f"All jobs in {area} (sum): %{{customdata[2]:,}}<br>"
+            f"<b>AI / All in {area}: %{{z:.2%}}</b><extra></extra>"
         )
-        return fig
+    return "Share of U.S. AI jobs", (
+        "<b>%{customdata[0]}</b> — " + period + "<br>"
+        f"AI jobs in {area} (sum): %{{customdata[1]:,}}<br>"
+        "U.S. AI jobs (sum): %{customdata[3]:,}<br>"
+        f"<b>{area.capitalize()} share of U.S. AI: %{{z:.2%}}</b><extra></extra>"
+    )
+
+def density_parts(metric, years_range):
+    """Everything on the density map that depends on the inputs; the template fixes the rest."""
+    empty = {"locations": [], "z": [], "customdata": [], "hovertemplate": None, "colorbar": None}
+    if not years_range or len(years_range) != 2:
+        return dict(empty, title="No year range selected")
 
     start_year, end_year = int(years_range[0]), int(years_range[1])
 
-    # Filter to selected years
-    df_years = density_map_data[(density_map_data["year"] >= start_year) &
-                                (density_map_data["year"] <= end_year)].copy()
+    # Per-state sums, U.S. total and metric from the precomputed year cube
+    with stage("aggregate"):
+        state_agg, us_ai_total_selected = snapshots.current().density_cube.metric(metric, start_year, end_year)
 
-    if df_years.empty:
-        fig = px.choropleth(locations=[], locationmode="USA-states", scope="usa", color=[])
-        fig.update_layout(
-            title_text=f"No data for {start_year}–{end_year}",
-            plot_bgcolor=light_gray, paper_bgcolor=gray,
-            font=dict(color="white", family="Gotham, sans-serif")
-        )
-        return fig
+    if state_agg.empty:
+        return dict(empty, title=f"No data for {start_year}–{end_year}")
 
-    # Aggregate per state across the selected years
-    state_agg = (df_years.groupby(["state_name", "state_abbrev"], as_index=False)
-        .agg(ai_jobs_count=("ai_jobs_count", "sum"),
-             all_jobs_state_year=("all_jobs_state_year", "sum"))
+    colorbar_title, hover_tmpl = density_labels(metric, f"{start_year}–{end_year}")
+    return {
+        "title": f"AI Job Density by State — {start_year}–{end_year}",
+        "locations": state_agg["state_abbrev"].tolist(),
+        "z": [None if math.isnan(v) else float(v) for v in state_agg["value"]],
+        # customdata columns: name, ai_count, all_jobs_sum, us_ai_total_selected
+        "customdata": state_agg[[
+            "state_name",
+            "ai_jobs_count",
+            "all_jobs_state_year"
+        ]].assign(us_total=us_ai_total_selected).values.tolist(),
+        "hovertemplate": hover_tmpl,
+        "colorbar": colorbar_title,
+    }
+
+@functools.lru_cache(maxsize=None)
+def density_template():
+    """The density map with no data: geo, colorscale and styling, built once per process."""
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Choropleth(
+        locations=[], z=[], locationmode="USA-states", coloraxis="coloraxis", geo="geo", name=""
+    ))
+    fig.update_geos(scope="usa")
+    fig.update_coloraxes(colorscale="Blues", showscale=False)
+    # If you want to show the colorbar: fig.update_coloraxes(showscale=True)
+    fig.update_layout(
+        plot_bgcolor=light_gray,
+        paper_bgcolor=gray,
+        font=dict(color="white", family="Gotham, sans-serif"),
+        margin=dict(l=10, r=10, t=50, b=10),
     )
+    return fig
 
-    # U.S. AI total across the selected years (compute from raw to avoid double-counting)
-    us_ai_total_selected = (df_years.groupby("year")["ai_jobs_count"].sum()).sum()
-
-    # Compute metric
-    if metric == "state_share":
-        # AI ÷ ALL within state across the selected years
-        state_agg["value"] = state_agg.apply(
-            lambda r: (r["ai_jobs_count"] / r["all_jobs_state_year"]) if r["all_jobs_state_year"] > 0 else None,
-            axis=1
-        )
-        colorbar_title = "AI share within state"
-        hover_tmpl = (
-            "<b>%{customdata[0]}</b> — " + f"{start_year}–{end_year}" + "<br>"
-            "AI jobs (sum): %{customdata[1]:,}<br>"
-            "All jobs in state (sum): %{customdata[2]:,}<br>"
-            "<b>AI / All in state: %{z:.2%}</b><extra></extra>"
-        )
-    else:
-        # Share of U.S. AI across selected years
-        denom = us_ai_total_selected if us_ai_total_selected and us_ai_total_selected > 0 else None
-        state_agg["value"] = state_agg["ai_jobs_count"] / denom if denom else None
-        colorbar_title = "Share of U.S. AI jobs"
-        hover_tmpl = (
-            "<b>%{customdata[0]}</b> — " + f"{start_year}–{end_year}" + "<br>"
-            "AI jobs in state (sum): %{customdata[1]:,}<br>"
-            "U.S. AI jobs (sum): %{customdata[3]:,}<br>"
-            "<b>State share of U.S. AI: %{z:.2%}</b><extra></extra>"
-        )
+def build_density_figure(metric, years_range):
+    """Full density figure (template plus the per-input fields)."""
+    import plotly.graph_objects as go
+    parts = density_parts(metric, years_range)
+    fig = go.Figure(density_template())
+    fig.update_traces(locations=parts["locations"], z=parts["z"], customdata=parts["customdata"])
+    if parts["hovertemplate"]:
+        fig.update_traces(hovertemplate=parts["hovertemplate"])
+        fig.update_coloraxes(colorbar_title_text=parts["colorbar"])
+    fig.update_layout(title_text=parts["title"])
+    return fig
 
-    # Build map
-    fig = px.choropleth(
-        state_agg,
-        locations="state_abbrev",
-        locationmode="USA-states",
-        color="value",
-        scope="usa",
-        color_continuous_scale="Blues",
-        title=f"AI Job Density by State — {start_year}–{end_year}",
+@metrics.instrument("update_density_map")
+@snapshots.pinned_call
+@figure_cache.memoize("density_map")
+def update_density_map(metric, years_range):
+    return choropleth_patch(density_parts(metric, years_range))
+
+def choropleth_patch(parts):
+    # Only the changed properties go over the wire; the graph already holds the template
+    with stage("figure"):
+        patch = Patch()
+        trace = patch["data"][0]
+        trace["locations"] = parts["locations"]
+        trace["z"] = parts["z"]
+        trace["customdata"] = parts["customdata"]
+        if parts["hovertemplate"]:
+            trace["hovertemplate"] = parts["hovertemplate"]
+            patch["layout"]["coloraxis"]["colorbar"]["title"]["text"] = parts["colorbar"]
+        patch["layout"]["title"]["text"] = parts["title"]
+    return patch
+
+@per_snapshot
+def density_client_payload():
+    """Everything the browser needs to redraw the map without a server round trip."""
+    from plotly.utils import PlotlyJSONEncoder
+    density_cube = snapshots.current().density_cube
+    payload = density_cube.client_payload()
+    payload["labels"] = {
+        metric: dict(zip(("colorbar", "hover"), density_labels(metric, "__PERIOD__")))
+        for metric in ("state_share", "national_share")
+    }
+    # Full default figure as the template; the browser only swaps the per-range fields
+    template = json.loads(json.dumps(
+        build_density_figure("national_share", [density_cube.min_year, density_cube.max_year]),
+        cls=PlotlyJSONEncoder))
+    if template["data"]:
+        template["data"][0].update(locations=[], z=[], customdata=[])
+    payload["template"] = template
+    return payload
+
+if CLIENTSIDE_DENSITY:
+    dash.clientside_callback(
+        ClientsideFunction(namespace="density", function_name="updateMap"),
+        dash.Output("density_map", "figure"),
+        [dash.Input("density_metric", "value"),
+         dash.Input("density_years", "value")],
+        dash.State("density_store", "data")
     )
+else:
+    dash.callback(
+        dash.Output("density_map", "figure"),
+        [dash.Input("density_metric", "value"),
+         dash.Input("density_years", "value")]
+    )(update_density_map)
 
-    # customdata columns: name, ai_count, all_jobs_sum, us_ai_total_selected
-    fig.update_traces(
-        customdata=state_agg[[
-            "state_name",
-            "ai_jobs_count",
-            "all_jobs_state_year"
-        ]].assign(us_total=us_ai_total_selected).values,
-        hovertemplate=hover_tmpl
-    )
+# =========================
+# Region drill-down (metro / county)
+# =========================
+# Only shown when region_index.py finds the region table and a level's GeoJSON.
+# One graph shows the selected level, so a slider step costs one drill-down
+# request, not one per level. The figure refers to the level's shapes by URL
+# (/region-shapes/<level>.geojson): the browser fetches each file once and
+# caches it, so shapes are never part of a layout or a patch. Slider, level
+# and state changes patch only the per-region fields, from prefix sums over
+# the selected state's regions.
+REGION_LEVELS = ("metro", "county")
+REGION_SHAPES_MAX_AGE = 24 * 3600
+
+def region_shapes_url(level):
+    """URL of the level's GeoJSON; the file's mtime busts browser caches when it is replaced.
+
+    The GeoJSON files are part of the snapshot version (data_snapshot.py), so a replaced
+    file also moves the cached drill-down layouts and patches to a new stamp.
+    """
+    from region_index import GEOJSON
+    try:
+        stamp = int(os.stat(GEOJSON[level]).st_mtime)
+    except OSError:
+        stamp = 0
+    return dash.get_relative_path(f"/region-shapes/{level}.geojson") + f"?v={stamp}"
+
+def region_drilldown(snap):
+    """Drill-down controls and the map of the selected level (empty without region data)."""
+    from region_index import LEVEL_LABELS, available_levels
+    levels = available_levels(snap.region_index)
+    if not levels:
+        return []
+    states = snap.region_index.states
+    return [html.Div([
+        html.Label("Drill down:", style={"color": "#ffffff", "marginBottom": "6px"}),
+        dcc.RadioItems(
+            id="region_level",
+            options=[{"label": LEVEL_LABELS[level], "value": level} for level in levels],
+            value=levels[0],
+            labelStyle={"display": "inline-block", "color": "#ffffff", "marginRight": "12px"}
+        ),
+        dcc.Dropdown(
+            id="region_state",
+            options=[{"label": s, "value": s} for s in states],
+            value="California" if "California" in states else states[0],
+            clearable=False
+        ),
+        dcc.Graph(id="region_map", figure=region_template())
+    ], style={"marginTop": "20px"})]
+
+def region_parts(level, metric, years_range, state):
+    """Per-input fields of a drill-down map for one state's metros or counties."""
+    from region_index import LEVEL_LABELS
+    empty = {"locations": [], "z": [], "customdata": [], "hovertemplate": None, "colorbar": None}
+    index = snapshots.current().region_index
+    if index is None or level not in REGION_LEVELS:
+        return dict(empty, title="No drill-down level selected")
+    empty["geojson"] = region_shapes_url(level)
+    if not years_range or len(years_range) != 2:
+        return dict(empty, title="No year range selected")
 
-    fig.update_coloraxes(colorbar_title=colorbar_title)
-    fig.update_coloraxes(showscale=False)
+    start_year, end_year = int(years_range[0]), int(years_range[1])
+    with stage("aggregate"):
+        sums, us_total = index.metric(level, metric, start_year, end_year, state)
+    if not len(sums["key"]):
+        return dict(empty, title=f"No data for {state}, {start_year}–{end_year}")
+
+    area = "metro area" if level == "metro" else "county"
+    colorbar_title, hover_tmpl = density_labels(metric, f"{start_year}–{end_year}", area)
+    return {
+        "title": f"AI Job Density — {LEVEL_LABELS[level]} in {state}, {start_year}–{end_year}",
+        "locations": sums["key"].tolist(),
+        "z": [None if math.isnan(v) else float(v) for v in sums["value"]],
+        "customdata": [[name, int(ai), int(total), us_total]
+                       for name, ai, total in zip(sums["name"], sums["ai_jobs"], sums["all_jobs"])],
+        "hovertemplate": hover_tmpl,
+        "colorbar": colorbar_title,
+        "geojson": empty["geojson"],
+    }
+
+@functools.lru_cache(maxsize=None)
+def region_template():
+    """Empty choropleth zoomed to whatever regions are drawn; the patches set its GeoJSON URL."""
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Choropleth(
+        featureidkey="id", locations=[], z=[],
+        coloraxis="coloraxis", name="", marker_line_width=0.3
+    ))
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_coloraxes(colorscale="Blues", showscale=False)
     fig.update_layout(
         plot_bgcolor=light_gray,
         paper_bgcolor=gray,
         font=dict(color="white", family="Gotham, sans-serif"),
         margin=dict(l=10, r=10, t=50, b=10),
     )
-    # If you want to hide the colorbar: fig.update_coloraxes(showscale=False)
     return fig
 
+def region_patch(parts):
+    patch = choropleth_patch(parts)
+    if parts.get("geojson"):
+        patch["data"][0]["geojson"] = parts["geojson"]
+    return patch
+
+@dash.callback(
+    dash.Output("region_map", "figure"),
+    [dash.Input("region_level", "value"),
+     dash.Input("density_metric", "value"),
+     dash.Input("density_years", "value"),
+     dash.Input("region_state", "value")]
+)
+@metrics.instrument("update_region_map")
+@snapshots.pinned_call
+@figure_cache.memoize("region_map")
+def update_region_map(level, metric, years_range, state):
+    return region_patch(region_parts(level, metric, years_range, state))
+
 # =========================
-# Existing callbacks (tabs 2 & 3)
+# Comparison callbacks (tabs 2 & 3)
 # =========================
+COMPARISONS = {
+    "career": {
+        "index": "career_index", "pvalues": "career_pvalues", "similarity": "career_similarity",
+        "intervals": "career_intervals",
+        "title": "Top 12 AI Career Areas: {} vs {}", "xaxis": "Career Area",
+        "top": 12, "multi_title": "Top 12 AI Career Areas across {} states",
+    },
+    "skills": {
+        "index": "skills_index", "pvalues": "skills_pvalues", "similarity": "skills_similarity",
+        "intervals": "skills_intervals",
+        "title": "Top 10 AI Skills: {} vs {}", "xaxis": "AI Skill",
+        "top": 10, "multi_title": "Top 10 AI Skills across {} states",
+    },
+}
+
 def format_pval_label(p):
     if p is None:
         return {"text": "n/a", "color": gray, "bold": False}
@@ -261,110 +487,437 @@ def format_pval_label(p):
     else:
         return {"text": f"p={p:.3f}", "color": gray, "bold": True}
 
-@app.callback(
-    dash.Output("career_comparison_chart", "figure"),
-    [dash.Input("career_state_1", "value"), dash.Input("career_state_2", "value")]
-)
-def update_career_chart(state1, state2):
-    filtered = top_ai_career_data[top_ai_career_data["state_name"].isin([state1, state2])]
-    pivot = filtered.pivot(index="lot_career_area_name", columns="state_name", values=["entry_count", "total_jobs"]).dropna()
-
-    pvals = []
-    for area in pivot.index:
-        count = pivot.loc[area, ("entry_count", [state1, state2])].values
-        nobs = pivot.loc[area, ("total_jobs", [state1, state2])].values
-        try:
-            _, p = proportions_ztest(count, nobs)
-        except:
-            p = None
-        pvals.append(p)
-
-    pivot["p_value"] = pvals
-    pivot = pivot.reset_index()
-
-    fig = px.bar(
-        filtered,
-        x="lot_career_area_name",
-        y="proportion",
-        color="state_name",
-        title=f"Top 12 AI Career Areas: {state1} vs {state2}",
-        labels={"lot_career_area_name": "Career Area", "proportion": "Percentage of AI Listings"},
-        barmode="group",
-        color_discrete_map={state1: orange, state2: gray}
+def pval_annotation(item, p):
+    label_info = format_pval_label(None if math.isnan(p) else float(p))
+    return dict(
+        x=item,
+        y=1.02,
+        text=f"<b>{label_info['text']}</b>" if label_info["bold"] else label_info["text"],
+        showarrow=False,
+        yref="paper",
+        xanchor="center",
+        font=dict(color=label_info["color"], size=11, family="Gotham, sans-serif")
     )
 
-    fig.update_traces(hovertemplate="<b>%{x}</b><br>%{y:.2%}<extra></extra>")
-    fig.update_layout(plot_bgcolor=light_gray, paper_bgcolor=gray, font=dict(color="white", family="Gotham, sans-serif"))
-
-    for i, item in enumerate(pivot["lot_career_area_name"]):
-        p = pivot.loc[i, "p_value"]
-        p = p.item() if isinstance(p, pd.Series) else p
-        label_info = format_pval_label(p)
-        fig.add_annotation(
-            x=item,
-            y=1.02,
-            text=f"<b>{label_info['text']}</b>" if label_info["bold"] else label_info["text"],
-            showarrow=False,
-            yref="paper",
-            xanchor="center",
-            font=dict(color=label_info["color"], size=11, family="Gotham, sans-serif")
-        )
+def comparison_parts(kind, state1, state2):
+    """Bar arrays, title and p-value annotations for one state pair."""
+    spec = COMPARISONS[kind]
+    snap = snapshots.current()
+    index = getattr(snap, spec["index"])
+    with stage("aggregate"):
+        ids = (index.state_id(state1), index.state_id(state2))
+        # Categories with a count and total in both states get a p-value label
+        shared = index.shared_categories(*ids)
+        intervals = getattr(snap, spec["intervals"])
+        traces = []
+        for i, (state, state_id) in enumerate(zip((state1, state2), ids)):
+            # Picking the same state twice draws it once
+            drawn = i == 0 or state2 != state1
+            x, y = index.state_rows(state_id) if drawn else ([], [])
+            # Error bars are looked up from the precomputed bounds
+            plus, minus = intervals.errors(state_id, index.row_ids(state_id), y) if drawn else ([], [])
+            traces.append({"x": x, "y": y, "name": state, "error_y": {"array": plus, "arrayminus": minus}})
+
+    with stage("statistics"):
+        pvals = getattr(snap, spec["pvalues"]).lookup_ids(*ids, shared)
+
+    return {
+        "title": spec["title"].format(state1, state2),
+        "traces": traces,
+        "annotations": [pval_annotation(item, p) for item, p in zip(index.categories[shared], pvals)],
+    }
+
+def interval_error_bars():
+    """Styling for the confidence-interval error bars; the arrays come from the patches."""
+    return dict(type="data", symmetric=False, array=[], arrayminus=[], color=dark_gray, thickness=1.2, width=3)
+
+@functools.lru_cache(maxsize=None)
+def comparison_template(kind):
+    """Two empty grouped bar traces (State 1 orange, State 2 gray) with the chart styling."""
+    import plotly.graph_objects as go
+    fig = go.Figure([
+        go.Bar(x=[], y=[], name="", marker_color=color, offsetgroup=str(i), alignmentgroup="True",
+               error_y=interval_error_bars(), hovertemplate="<b>%{x}</b><br>%{y:.2%}<extra></extra>")
+        for i, color in enumerate((orange, gray))
+    ])
+    fig.update_layout(
+        barmode="group",
+        legend_title_text="state_name",
+        xaxis_title_text=COMPARISONS[kind]["xaxis"],
+        yaxis_title_text="Percentage of AI Listings",
+        plot_bgcolor=light_gray, paper_bgcolor=gray, font=dict(color="white", family="Gotham, sans-serif")
+    )
+    return fig
 
+def build_comparison_figure(kind, state1, state2):
+    """Full comparison figure (template plus the per-pair fields)."""
+    import plotly.graph_objects as go
+    parts = comparison_parts(kind, state1, state2)
+    fig = go.Figure(comparison_template(kind))
+    for trace, values in zip(fig.data, parts["traces"]):
+        trace.update(values)
+    fig.update_layout(title_text=parts["title"], annotations=parts["annotations"])
     return fig
 
-@app.callback(
+def comparison_patch(kind, state1, state2):
+    parts = comparison_parts(kind, state1, state2)
+    with stage("figure"):
+        patch = Patch()
+        for i, values in enumerate(parts["traces"]):
+            for prop, value in values.items():
+                if isinstance(value, dict):  # keep the template's styling of nested objects
+                    for key, item in value.items():
+                        patch["data"][i][prop][key] = item
+                else:
+                    patch["data"][i][prop] = value
+        patch["layout"]["title"]["text"] = parts["title"]
+        patch["layout"]["annotations"] = parts["annotations"]
+    return patch
+
+@dash.callback(
+    dash.Output("career_comparison_chart", "figure"),
+    [dash.Input("career_state_1", "value"), dash.Input("career_state_2", "value")]
+)
+@metrics.instrument("update_career_chart")
+@snapshots.pinned_call
+@figure_cache.memoize("career_chart")
+def update_career_chart(state1, state2):
+    return comparison_patch("career", state1, state2)
+
+@dash.callback(
     dash.Output("skills_comparison_chart", "figure"),
     [dash.Input("skills_state_1", "value"), dash.Input("skills_state_2", "value")]
 )
+@metrics.instrument("update_skills_chart")
+@snapshots.pinned_call
+@figure_cache.memoize("skills_chart")
 def update_skills_chart(state1, state2):
-    filtered = top_ai_skills_data[top_ai_skills_data["state_name"].isin([state1, state2])]
-    pivot = filtered.pivot(index="skills_name", columns="state_name", values=["skill_count", "total_ai_listings"]).dropna()
-
-    pvals = []
-    for skill in pivot.index:
-        count = pivot.loc[skill, ("skill_count", [state1, state2])].values
-        nobs = pivot.loc[skill, ("total_ai_listings", [state1, state2])].values
-        try:
-            _, p = proportions_ztest(count, nobs)
-        except:
-            p = None
-        pvals.append(p)
-
-    pivot["p_value"] = pvals
-    pivot = pivot.reset_index()
-
-    fig = px.bar(
-        filtered,
-        x="skills_name",
-        y="proportion",
-        color="state_name",
-        title=f"Top 10 AI Skills: {state1} vs {state2}",
-        labels={"skills_name": "AI Skill", "proportion": "Percentage of AI Listings"},
-        barmode="group",
-        color_discrete_map={state1: orange, state2: gray}
-    )
+    return comparison_patch("skills", state1, state2)
 
-    fig.update_traces(hovertemplate="<b>%{x}</b><br>%{y:.2%}<extra></extra>")
-    fig.update_layout(plot_bgcolor=light_gray, paper_bgcolor=gray, font=dict(color="white", family="Gotham, sans-serif"))
-
-    for i, item in enumerate(pivot["skills_name"]):
-        p = pivot.loc[i, "p_value"]
-        p = p.item() if isinstance(p, pd.Series) else p
-        label_info = format_pval_label(p)
-        fig.add_annotation(
-            x=item,
-            y=1.02,
-            text=f"<b>{label_info['text']}</b>" if label_info["bold"] else label_info["text"],
-            showarrow=False,
-            yref="paper",
-            xanchor="center",
-            font=dict(color=label_info["color"], size=11, family="Gotham, sans-serif")
-        )
+# =========================
+# Multi-state comparison (tabs 2 & 3)
+# =========================
+# Any number of states at once: one chi-square test of equal proportions per
+# category across every selected state, and one bar trace per state placed on
+# numeric slots, so each state has a legend entry and its own color even at 51.
+MULTI_GROUP_WIDTH = 0.8
+
+def multi_comparison_parts(kind, states):
+    """Per-state bar arrays, category ticks and chi-square annotations for a set of states."""
+    import numpy as np
+    from proportion_stats import k_sample_chi2
+    spec = COMPARISONS[kind]
+    snap = snapshots.current()
+    index = getattr(snap, spec["index"])
+    states = [s for s in dict.fromkeys(states or []) if index.state_id(s) >= 0]
+    empty = {"traces": [], "tickvals": [], "ticktext": [], "annotations": []}
+    if not states:
+        return dict(empty, title="Select states to compare")
+
+    with stage("aggregate"):
+        ids = np.array([index.state_id(s) for s in states])
+        counts, nobs = index.counts[ids], index.nobs[ids]
+        # Categories with the most listings across the selection, in that order
+        totals = np.where(np.isfinite(counts), counts, 0.0).sum(axis=0)
+        ranked = np.argsort(-totals, kind="stable")
+        categories = ranked[np.isfinite(counts[:, ranked]).any(axis=0)][:spec["top"]]
+        values = index.proportions[np.ix_(ids, categories)]
+        intervals = getattr(snap, spec["intervals"])
+        with np.errstate(invalid="ignore"):
+            plus = np.maximum(intervals.upper[np.ix_(ids, categories)] - values, 0.0)
+            minus = np.maximum(values - intervals.lower[np.ix_(ids, categories)], 0.0)
+
+    with stage("statistics"):
+        _, _, pvals = k_sample_chi2(counts[:, categories], nobs[:, categories])
+
+    # Each state keeps its slot (and color) in every category group
+    width = MULTI_GROUP_WIDTH / len(states)
+    offsets = (np.arange(len(states)) - (len(states) - 1) / 2) * width
+    palette = multi_palette(len(index.states))
+    names = index.categories[categories]
+    traces = []
+    for i, state in enumerate(states):
+        present = np.flatnonzero(np.isfinite(values[i]))
+        traces.append({
+            "name": state,
+            "x": (present + offsets[i]).tolist(),
+            "y": values[i, present].tolist(),
+            "width": width,
+            "marker": {"color": palette[i % len(palette)]},
+            "customdata": names[present].tolist(),
+            "error_y": {"array": plus[i, present].tolist(), "arrayminus": minus[i, present].tolist()},
+        })
+    return {
+        "title": spec["multi_title"].format(len(states)),
+        "traces": traces,
+        "tickvals": list(range(len(categories))),
+        "ticktext": names.tolist(),
+        "annotations": [pval_annotation(i, p) for i, p in enumerate(pvals)],
+    }
+
+@functools.lru_cache(maxsize=None)
+def multi_palette(n_colors):
+    """The two-state chart's colors, then distinct hues sampled along Turbo: one per state."""
+    import plotly.colors
+    extra = max(n_colors - 3, 1)
+    return [orange, gray, green] + plotly.colors.sample_colorscale(
+        "Turbo", [i / max(extra - 1, 1) for i in range(extra)])
+
+def multi_bar_trace(values):
+    """One state's bars with the shared styling; ``values`` are the per-selection fields."""
+    error_y = dict(interval_error_bars(), **values["error_y"])
+    return dict(values, type="bar", error_y=error_y,
+                hovertemplate="<b>%{fullData.name}</b><br>%{customdata}<br>%{y:.2%}<extra></extra>")
+
+@functools.lru_cache(maxsize=None)
+def multi_comparison_template(kind):
+    """Axes and legend for the multi-state chart; the patches supply one bar trace per state."""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.update_layout(
+        # Bars are already placed in their slots, so traces must not be offset again
+        barmode="overlay",
+        xaxis=dict(title_text=COMPARISONS[kind]["xaxis"], tickmode="array", tickvals=[], ticktext=[]),
+        yaxis_title_text="Percentage of AI Listings",
+        legend_title_text="State",
+        showlegend=True,
+        plot_bgcolor=light_gray, paper_bgcolor=gray, font=dict(color="white", family="Gotham, sans-serif")
+    )
+    return fig
 
+def build_multi_comparison_figure(kind, states):
+    """Full multi-state figure (template plus the per-selection fields)."""
+    import plotly.graph_objects as go
+    parts = multi_comparison_parts(kind, states)
+    fig = go.Figure(multi_comparison_template(kind))
+    fig.add_traces([go.Bar(multi_bar_trace(trace)) for trace in parts["traces"]])
+    fig.update_xaxes(tickvals=parts["tickvals"], ticktext=parts["ticktext"])
+    fig.update_layout(title_text=parts["title"], annotations=parts["annotations"])
     return fig
 
-# Server
-server = app.server
+def multi_comparison_patch(kind, states):
+    parts = multi_comparison_parts(kind, states)
+    with stage("figure"):
+        patch = Patch()
+        # The number of traces follows the selection, so the trace list is replaced whole
+        patch["data"] = [multi_bar_trace(trace) for trace in parts["traces"]]
+        patch["layout"]["xaxis"]["tickvals"] = parts["tickvals"]
+        patch["layout"]["xaxis"]["ticktext"] = parts["ticktext"]
+        patch["layout"]["title"]["text"] = parts["title"]
+        patch["layout"]["annotations"] = parts["annotations"]
+    return patch
+
+@dash.callback(
+    dash.Output("career_multi_chart", "figure"),
+    dash.Input("career_states_multi", "value")
+)
+@metrics.instrument("update_career_multi_chart")
+@snapshots.pinned_call
+@figure_cache.memoize("career_multi_chart")
+def update_career_multi_chart(states):
+    return multi_comparison_patch("career", states)
+
+@dash.callback(
+    dash.Output("skills_multi_chart", "figure"),
+    dash.Input("skills_states_multi", "value")
+)
+@metrics.instrument("update_skills_multi_chart")
+@snapshots.pinned_call
+@figure_cache.memoize("skills_multi_chart")
+def update_skills_multi_chart(states):
+    return multi_comparison_patch("skills", states)
+
+# =========================
+# Similar states (tabs 2 & 3)
+# =========================
+# Neighbors of State 1 by career/skill profile, from the similarity matrices
+# precomputed in the snapshot. The button copies them into the comparison
+# dropdowns: the closest state as State 2, and State 1 plus its neighbors in
+# the multi-state chart.
+SIMILAR_STATES_K = 5
+
+def similar_states_controls(kind):
+    from state_similarity import METHOD_LABELS, METHODS
+    return html.Div([
+        html.Label("Most similar to State 1:", style={"color": "#ffffff", "marginRight": "10px"}),
+        dcc.RadioItems(
+            id=f"{kind}_similarity_method",
+            options=[{"label": METHOD_LABELS[method], "value": method} for method in METHODS],
+            value=METHODS[0],
+            labelStyle={"display": "inline-block", "color": "#ffffff", "marginRight": "10px"},
+            style={"display": "inline-block"}
+        ),
+        html.Span(id=f"{kind}_similar_states", style={"color": "#ffffff", "marginRight": "10px"}),
+        html.Button("Compare with most similar", id=f"{kind}_similar_button", n_clicks=0)
+    ], style={"margin": "10px 0"})
+
+def similar_states(kind, state, method):
+    similarity = getattr(snapshots.current(), COMPARISONS[kind]["similarity"])
+    return similarity.neighbors(state, SIMILAR_STATES_K, method)
+
+def similarity_callbacks(kind):
+    @dash.callback(
+        dash.Output(f"{kind}_similar_states", "children"),
+        [dash.Input(f"{kind}_state_1", "value"), dash.Input(f"{kind}_similarity_method", "value")]
+    )
+    @metrics.instrument(f"update_{kind}_similar_states")
+    @snapshots.pinned_call
+    def update_similar_states(state, method):
+        neighbors = similar_states(kind, state, method)
+        return ", ".join(f"{name} ({score:.3f})" for name, score in neighbors) or "n/a"
+
+    @dash.callback(
+        [dash.Output(f"{kind}_state_2", "value"), dash.Output(f"{kind}_states_multi", "value")],
+        dash.Input(f"{kind}_similar_button", "n_clicks"),
+        [dash.State(f"{kind}_state_1", "value"), dash.State(f"{kind}_similarity_method", "value")],
+        prevent_initial_call=True
+    )
+    @metrics.instrument(f"prefill_{kind}_similar_states")
+    @snapshots.pinned_call
+    def prefill_similar_states(n_clicks, state, method):
+        names = [name for name, _ in similar_states(kind, state, method)]
+        if not names:
+            return dash.no_update, dash.no_update
+        return names[0], [state] + names
+
+    return update_similar_states, prefill_similar_states
+
+update_career_similar_states, prefill_career_similar_states = similarity_callbacks("career")
+update_skills_similar_states, prefill_skills_similar_states = similarity_callbacks("skills")
+
+# =========================
+# Cache warm-up
+# =========================
+def warm_figure_cache(snapshot=None):
+    """Compute the figures every new session asks for first."""
+    density_cube = (snapshot or snapshots.current()).density_cube
+    update_density_map("national_share", [density_cube.min_year, density_cube.max_year])
+    update_career_chart("California", "Tennessee")
+    update_skills_chart("California", "Tennessee")
+    update_career_multi_chart(DEFAULT_MULTI_STATES)
+    update_skills_multi_chart(DEFAULT_MULTI_STATES)
+
+snapshots.on_swap(warm_figure_cache)
+
+# Data versions this process has served most recently (the previous one may still be pinned)
+_served_versions = collections.deque(maxlen=2)
+
+@snapshots.on_swap
+def prune_figure_cache(snapshot):
+    """Drop the disk tier of this code's data versions older than the previous one.
+
+    Under gunicorn.conf.py the master prunes after each publish and workers leave the
+    shared directory alone. Other code versions are never touched from here.
+    """
+    _served_versions.append(snapshot.version)
+    if os.environ.get("DASHBOARD_SHM_MANIFEST"):
+        return
+    removed = figure_cache.prune(list(_served_versions))
+    if removed:
+        logger.info("Pruned %d stale figure cache version(s)", len(removed))
+
+@metrics.add_collector
+def figure_cache_metrics():
+    stats = figure_cache.stats()
+    lines = []
+    for counter in ("memory_hits", "disk_hits", "misses", "evictions", "coalesced", "worker_waits"):
+        lines.append(f"# TYPE dashboard_figure_cache_{counter}_total counter")
+        lines.append(f"dashboard_figure_cache_{counter}_total {stats[counter]}")
+    lines.append("# TYPE dashboard_figure_cache_entries gauge")
+    lines.append(f"dashboard_figure_cache_entries {stats['size']}")
+    lines.append("# TYPE dashboard_data_snapshot_info gauge")
+    lines.append(f'dashboard_data_snapshot_info{{version="{stats["version"]}"}} 1')
+    return lines
+
+@metrics.add_collector
+def startup_metrics():
+    lines = ["# HELP dashboard_startup_seconds Time spent in each startup phase of this process.",
+             "# TYPE dashboard_startup_seconds gauge"]
+    for phase, seconds in STARTUP_SECONDS.items():
+        lines.append(f'dashboard_startup_seconds{{phase="{phase}"}} {seconds:.6f}')
+    return lines
+
+# =========================
+# App factory
+# =========================
+def create_app(warm=None):
+    """Load the data, build the Dash app and its routes, and warm the figure cache.
+
+    ``warm`` defaults to DASHBOARD_WARM_CACHE (on). Callbacks are registered at import
+    time, so every app created here shares them.
+    """
+    started = time.perf_counter()
+    snapshots.load()
+    loaded = time.perf_counter()
+
+    app = dash.Dash(
+        __name__,
+        suppress_callback_exceptions=True,
+        external_stylesheets=["https://fonts.googleapis.com/css2?family=Montserrat&display=swap"]
+    )
+    app.layout = serve_layout
+    server = app.server
+
+    @server.route("/cache-stats")
+    def cache_stats():
+        return flask.jsonify(figure_cache.stats())
+
+    # Prometheus text at /metrics: callback/stage timings, payload bytes, cache counters.
+    # DASHBOARD_SLOW_CALLBACK_SECONDS / DASHBOARD_PROFILE_SAMPLE_RATE control the slow log.
+    metrics.register(server)
+
+    # Aggregates as compact JSON with ETags and compression at /api/density, /api/careers, /api/skills
+    aggregate_api.register(server, snapshots)
+
+    # Drill-down shapes, fetched once per browser (conditional GETs after that)
+    @server.route("/region-shapes/<level>.geojson")
+    def region_shapes(level):
+        from region_index import GEOJSON
+        if level not in REGION_LEVELS or not os.path.exists(GEOJSON[level]):
+            flask.abort(404)
+        return flask.send_file(os.path.abspath(GEOJSON[level]), mimetype="application/geo+json",
+                               max_age=REGION_SHAPES_MAX_AGE)
+
+    # Tab layouts are built once here rather than on the first tab switch
+    tab_layouts()
+    if CLIENTSIDE_DENSITY:
+        density_client_payload()
+    built = time.perf_counter()
+
+    if warm is None:
+        warm = os.environ.get("DASHBOARD_WARM_CACHE", "1") == "1"
+    _served_versions.append(snapshots.current().version)
+    if warm:
+        warm_figure_cache()
+    snapshots.start_watching()
+    finished = time.perf_counter()
+
+    STARTUP_SECONDS.update(data=loaded - started, layout=built - loaded,
+                           warm=finished - built, create_app=finished - started)
+    logger.info("Dashboard ready in %.2fs (import %.2fs, data %.2fs, layout %.2fs, warm-up %.2fs)",
+                STARTUP_SECONDS["import"] + finished - started, STARTUP_SECONDS["import"],
+                loaded - started, built - loaded, finished - built)
+    return app
+
+_app = None
+
+def get_app():
+    """The process-wide app, created on first use."""
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+def __getattr__(name):
+    # ``NewDashboardFile:server`` (gunicorn) and ``NewDashboardFile.app`` build the app on first access
+    if name == "app":
+        return get_app()
+    if name == "server":
+        return get_app().server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+STARTUP_SECONDS["import"] = time.perf_counter() - _import_started
 
 if __name__ == "__main__":
-    app.run_server(debug=True, host="0.0.0.0", port=8050)
+    logging.basicConfig(level=logging.INFO)
+    get_app().run_server(debug=True, host="0.0.0.0", port=8050)
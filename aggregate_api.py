@@ -0,0 +1,218 @@
+import functools
+import gzip
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import flask
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# =========================
+# JSON aggregate API
+# =========================
+# The numbers behind the charts, without the Plotly figure around them:
+#
+#   GET /api/density?metric=national_share&start=2015&end=2023
+#   GET /api/careers?state1=California&state2=Tennessee
+#   GET /api/skills?state1=California&state2=Tennessee
+#
+# Responses are columnar JSON. The ETag is derived from the data snapshot
+# version and the normalized query, so a matching If-None-Match is answered
+# with 304 before anything is computed, and reverse proxies can cache freely
+# until the data changes. Encoded bodies are kept in a small LRU per process.
+
+MAX_AGE = int(os.environ.get("DASHBOARD_API_MAX_AGE", "60"))
+MIN_COMPRESS_BYTES = 512
+# Part of every ETag; bump when response fields change so cached bodies are not revalidated
+# (2: confidence interval bounds in /api/careers and /api/skills; 3: null p-values for a state vs itself)
+API_FORMAT = 3
+
+COMPARISON_ENDPOINTS = {
+    "careers": {"index": "career_index", "pvalues": "career_pvalues", "intervals": "career_intervals"},
+    "skills": {"index": "skills_index", "pvalues": "skills_pvalues", "intervals": "skills_intervals"},
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _number(value):
+    """JSON-safe float (NaN -> null)."""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+# =========================
+# Aggregates
+# =========================
+def density_query(snapshot, args):
+    cube = snapshot.density_cube
+    metric = args.get("metric", "national_share")
+    if metric not in ("state_share", "national_share"):
+        raise ApiError(400, "metric must be 'state_share' or 'national_share'")
+    try:
+        start = int(args.get("start", cube.min_year))
+        end = int(args.get("end", cube.max_year))
+    except ValueError:
+        raise ApiError(400, "start and end must be years")
+    if start > end:
+        raise ApiError(400, "start must not be after end")
+    return {"metric": metric, "start": start, "end": end}
+
+
+def density_aggregate(snapshot, metric, start, end):
+    state_agg, us_total = snapshot.density_cube.metric(metric, start, end)
+    return {
+        "metric": metric,
+        "start_year": start,
+        "end_year": end,
+        "us_ai_jobs": us_total,
+        "state": state_agg["state_name"].tolist(),
+        "abbrev": state_agg["state_abbrev"].tolist(),
+        "ai_jobs": state_agg["ai_jobs_count"].tolist(),
+        "all_jobs": state_agg["all_jobs_state_year"].tolist(),
+        "value": [_number(v) for v in state_agg["value"]],
+    }
+
+
+def comparison_query(snapshot, args, kind):
+    index = getattr(snapshot, COMPARISON_ENDPOINTS[kind]["index"])
+    state1, state2 = args.get("state1"), args.get("state2")
+    if not state1 or not state2:
+        raise ApiError(400, "state1 and state2 are required")
+    for state in (state1, state2):
+        if index.state_id(state) < 0:
+            raise ApiError(404, f"no {kind} data for {state!r}")
+    return {"state1": state1, "state2": state2}
+
+
+def comparison_aggregate(snapshot, kind, state1, state2):
+    spec = COMPARISON_ENDPOINTS[kind]
+    index = getattr(snapshot, spec["index"])
+    intervals = getattr(snapshot, spec["intervals"])
+    ids = (index.state_id(state1), index.state_id(state2))
+    states = {}
+    for state, state_id in zip((state1, state2), ids):
+        categories, proportions = index.state_rows(state_id)
+        cat_ids = index.row_ids(state_id)
+        states[state] = {
+            "category": categories,
+            "count": [_number(v) for v in index.counts[state_id, cat_ids]],
+            "total": [_number(v) for v in index.nobs[state_id, cat_ids]],
+            "proportion": [_number(v) for v in proportions],
+            "lower": [_number(v) for v in intervals.lower[state_id, cat_ids]],
+            "upper": [_number(v) for v in intervals.upper[state_id, cat_ids]],
+        }
+    shared = index.shared_categories(*ids)
+    pvalues = getattr(snapshot, spec["pvalues"]).lookup_ids(*ids, shared)
+    return {
+        "state1": state1,
+        "state2": state2,
+        "interval": {"method": intervals.method, "confidence": intervals.confidence},
+        "states": states,
+        "tests": {"category": index.categories[shared].tolist(),
+                  "pvalue": [_number(p) for p in pvalues]},
+    }
+
+
+# =========================
+# HTTP layer
+# =========================
+def _etag(version, endpoint, query):
+    raw = json.dumps([API_FORMAT, endpoint, query], sort_keys=True)
+    return f"{version}-{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _pick_encoding(accept_encodings):
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return "identity"
+
+
+class _BodyCache:
+    """LRU of serialized (and compressed) bodies; the version in the key retires stale entries."""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+
+def _encode(payload, encoding):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, "identity"
+    if encoding == "br":
+        return brotli.compress(body, quality=5), "br"
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0), "gzip"
+    return body, "identity"
+
+
+def register(server, snapshots, cache_size=512):
+    """Add the ``/api/*`` aggregate endpoints to a Flask server."""
+    bodies = _BodyCache(cache_size)
+
+    def serve(endpoint, parse, compute):
+        with snapshots.pin() as snapshot:
+            try:
+                query = parse(snapshot, flask.request.args)
+            except ApiError as exc:
+                response = flask.jsonify(error=exc.message)
+                response.status_code = exc.status
+                return response
+
+            etag = _etag(snapshot.version, endpoint, query)
+            if flask.request.if_none_match.contains_weak(etag):
+                response = flask.Response(status=304)
+            else:
+                encoding = _pick_encoding(flask.request.accept_encodings)
+                key = (etag, encoding)
+                body, encoding = bodies.get(key, lambda: _encode(compute(snapshot, **query), encoding))
+                response = flask.Response(body, mimetype="application/json")
+                if encoding != "identity":
+                    response.headers["Content-Encoding"] = encoding
+            # Weak: the gzip and brotli bodies are the same resource
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = f"public, max-age={MAX_AGE}"
+            response.vary.add("Accept-Encoding")
+            return response
+
+    @server.route("/api/density")
+    def api_density():
+        return serve("density", density_query, density_aggregate)
+
+    @server.route("/api/careers")
+    def api_careers():
+        return serve("careers", functools.partial(comparison_query, kind="careers"),
+                     functools.partial(comparison_aggregate, kind="careers"))
+
+    @server.route("/api/skills")
+    def api_skills():
+        return serve("skills", functools.partial(comparison_query, kind="skills"),
+                     functools.partial(comparison_aggregate, kind="skills"))
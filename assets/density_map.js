@@ -0,0 +1,69 @@
+// Clientside density map (DASHBOARD_CLIENTSIDE_DENSITY=1).
+// Mirrors DensityYearCube.metric: per-state sums over the selected years, the
+// U.S. AI total, and the selected metric, patched into the server-built template.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    density: {
+        updateMap: function (metric, yearsRange, store) {
+            if (!store) {
+                return window.dash_clientside.no_update;
+            }
+            var fig = JSON.parse(JSON.stringify(store.template));
+            var trace = fig.data[0];
+            trace.locations = [];
+            trace.z = [];
+            trace.customdata = [];
+
+            if (!yearsRange || yearsRange.length !== 2) {
+                fig.layout.title = {text: "No year range selected"};
+                return fig;
+            }
+            var startYear = Math.trunc(yearsRange[0]);
+            var endYear = Math.trunc(yearsRange[1]);
+            var nYears = store.ai.length ? store.ai[0].length : 0;
+            var lo = Math.min(Math.max(startYear - store.min_year, 0), nYears);
+            var hi = Math.max(lo, Math.min(Math.max(endYear - store.min_year + 1, 0), nYears));
+
+            var rows = [];
+            var usTotal = 0;
+            for (var s = 0; s < store.names.length; s++) {
+                var ai = 0, all = 0, present = 0;
+                for (var y = lo; y < hi; y++) {
+                    ai += store.ai[s][y];
+                    all += store.all[s][y];
+                    present += store.rows[s][y];
+                }
+                if (present === 0) {
+                    continue;
+                }
+                usTotal += ai;
+                if (store.abbrevs[s] !== null) {
+                    rows.push([s, ai, all]);
+                }
+            }
+
+            var period = startYear + "–" + endYear;
+            if (!rows.length) {
+                fig.layout.title = {text: "No data for " + period};
+                return fig;
+            }
+            rows.forEach(function (r) {
+                var value;
+                if (metric === "state_share") {
+                    value = r[2] > 0 ? r[1] / r[2] : null;
+                } else {
+                    value = usTotal > 0 ? r[1] / usTotal : null;
+                }
+                trace.locations.push(store.abbrevs[r[0]]);
+                trace.z.push(value);
+                trace.customdata.push([store.names[r[0]], r[1], r[2], usTotal]);
+            });
+
+            var labels = store.labels[metric] || store.labels.national_share;
+            trace.hovertemplate = labels.hover.replace("__PERIOD__", period);
+            fig.layout.title.text = "AI Job Density by State — " + period;
+            fig.layout.coloraxis.colorbar = Object.assign({}, fig.layout.coloraxis.colorbar,
+                {title: {text: labels.colorbar}});
+            return fig;
+        }
+    }
+});
@@ -0,0 +1,166 @@
+"""Offline latency benchmark for the dashboard callbacks.
+
+Imports the app and calls the callback functions directly over the whole input
+space: every tab, every contiguous year range for both density metrics, all
+ordered state pairs for the career and skills comparisons, and multi-state
+selections of 2 to 51 states. Figure callbacks are timed uncached unless
+``--cached`` is given.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --threshold 0.2   # exit 1 on regression
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# Deterministic, offline runs: no shared disk cache, no reload thread
+os.environ.setdefault("DASHBOARD_CACHE_DIR", "")
+os.environ.setdefault("DASHBOARD_RELOAD_INTERVAL", "0")
+
+import numpy as np
+from plotly.utils import PlotlyJSONEncoder
+
+import NewDashboardFile as dashboard
+
+METRICS = ("state_share", "national_share")
+TABS = ("tab1", "tab2", "tab3")
+
+
+def build_cases(pair_sample=None, seed=0):
+    """{callback name: (function, [argument tuples])} covering the input space."""
+    snap = dashboard.snapshots.current()
+    dashboard.tab_layouts()  # built once by create_app() in a served app
+    years = snap.density_cube.years
+    ranges = [[a, b] for a, b in itertools.combinations_with_replacement(years, 2)]
+    career_states = sorted(snap.top_ai_career_data["state_name"].unique())
+    skills_states = sorted(snap.top_ai_skills_data["state_name"].unique())
+    career_pairs = list(itertools.product(career_states, repeat=2))
+    skills_pairs = list(itertools.product(skills_states, repeat=2))
+    if pair_sample:
+        rng = random.Random(seed)
+        career_pairs = rng.sample(career_pairs, min(pair_sample, len(career_pairs)))
+        skills_pairs = rng.sample(skills_pairs, min(pair_sample, len(skills_pairs)))
+
+    # Multi-state selections: a few random subsets per size, up to every state
+    rng = random.Random(seed)
+    selections = [rng.sample(career_states, min(k, len(career_states)))
+                  for k in (2, 5, 10, 25, 51) for _ in range(5)]
+
+    return {
+        "render_content": (dashboard.render_content, [(tab,) for tab in TABS]),
+        "update_density_map": (dashboard.update_density_map,
+                               [(metric, r) for metric in METRICS for r in ranges]),
+        "update_career_chart": (dashboard.update_career_chart, career_pairs),
+        "update_skills_chart": (dashboard.update_skills_chart, skills_pairs),
+        "update_career_multi_chart": (dashboard.update_career_multi_chart, [(s,) for s in selections]),
+        "update_skills_multi_chart": (dashboard.update_skills_multi_chart, [(s,) for s in selections]),
+    }
+
+
+def _serialized_size(value):
+    return len(json.dumps(value, cls=PlotlyJSONEncoder).encode("utf-8"))
+
+
+def run_callback(func, cases, cached=False, repeat=1, memory=True):
+    target = func if cached else getattr(func, "uncached", func)
+    latencies, sizes = [], []
+    for args in cases:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            value = target(*args)
+            latencies.append(time.perf_counter() - start)
+        sizes.append(_serialized_size(value))
+
+    peak = None
+    if memory:
+        # Separate pass: tracemalloc overhead would distort the latencies above
+        tracemalloc.start()
+        for args in cases:
+            tracemalloc.reset_peak()
+            target(*args)
+            peak = max(peak or 0, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "calls": len(latencies),
+        "median_ms": float(np.median(ms)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "max_ms": float(ms.max()),
+        "peak_memory_bytes": peak,
+        "median_payload_bytes": int(np.median(sizes)),
+        "max_payload_bytes": int(max(sizes)),
+    }
+
+
+def check_regressions(results, baseline, threshold, stat="p95_ms"):
+    """Callbacks whose ``stat`` grew by more than ``threshold`` (a fraction) over the baseline."""
+    failures = []
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before and before.get(stat) and current[stat] > before[stat] * (1 + threshold):
+            failures.append((name, before[stat], current[stat]))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed fractional slowdown vs the baseline (default 0.2)")
+    parser.add_argument("--stat", default="p95_ms", choices=["median_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--only", action="append", help="benchmark only this callback (repeatable)")
+    parser.add_argument("--pair-sample", type=int, help="random subset of state pairs instead of all")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--cached", action="store_true", help="go through the figure cache")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (func, cases) in build_cases(args.pair_sample).items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = run_callback(func, cases, args.cached, args.repeat, not args.no_memory)
+        r = results[name]
+        print(f"{name:26s} n={r['calls']:5d}  median={r['median_ms']:7.2f}ms  p95={r['p95_ms']:7.2f}ms  "
+              f"p99={r['p99_ms']:7.2f}ms  payload={r['median_payload_bytes']}B", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "data_version": dashboard.snapshots.current().version,
+            "cached": args.cached,
+            "repeat": args.repeat,
+            "pair_sample": args.pair_sample,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            failures = check_regressions(results, json.load(fh), args.threshold, args.stat)
+        for name, before, after in failures:
+            print(f"REGRESSION {name}: {args.stat} {before:.2f}ms -> {after:.2f}ms", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
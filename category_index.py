@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# Dictionary-encoded state × category index for the comparison charts
+# =========================
+# Built once at load. States and categories (career areas, skills) get integer
+# ids and the counts, totals and proportions live in dense state × category
+# arrays, so a dropdown pair is two row slices instead of string filters and a
+# pivot over the whole table. Missing (state, category) cells are NaN.
+
+# The rollup row ingest.py adds for everything outside a state's top N
+OTHER_CATEGORY = "Other"
+
+
+class StateCategoryIndex:
+    def __init__(self, df, category_col, count_col, nobs_col, value_col="proportion"):
+        state_codes, states = pd.factorize(df["state_name"], sort=True)
+        category_codes, categories = pd.factorize(df[category_col], sort=True)
+        keep = (state_codes >= 0) & (category_codes >= 0)
+        state_codes, category_codes = state_codes[keep], category_codes[keep]
+
+        self.states = np.asarray(states, dtype=object)
+        self.categories = np.asarray(categories, dtype=object)
+        shape = (len(self.states), len(self.categories))
+        self.counts = np.full(shape, np.nan)
+        self.nobs = np.full(shape, np.nan)
+        self.proportions = np.full(shape, np.nan)
+        for target, col in ((self.counts, count_col), (self.nobs, nobs_col), (self.proportions, value_col)):
+            target[state_codes, category_codes] = df[col].to_numpy(dtype=float)[keep]
+
+        # Each state's categories in source order (the charts keep the file's ranking), CSR-style
+        order = np.argsort(state_codes, kind="stable")
+        self.row_categories = category_codes[order].astype(np.int32)
+        self.offsets = np.searchsorted(state_codes[order], np.arange(len(self.states) + 1)).astype(np.int64)
+        self._build_lookups()
+
+    def _build_lookups(self):
+        self._state_ids = {state: i for i, state in enumerate(self.states)}
+
+    def state_id(self, state):
+        """Integer id of ``state``, or -1 if it has no rows."""
+        return self._state_ids.get(state, -1)
+
+    def row_ids(self, state_id):
+        """Category ids of one state's rows in source order."""
+        if state_id < 0:
+            return np.empty(0, dtype=np.int32)
+        return self.row_categories[self.offsets[state_id]:self.offsets[state_id + 1]]
+
+    def state_rows(self, state_id):
+        """(category names, proportions) of one state's rows in source order."""
+        if state_id < 0:
+            return [], []
+        ids = self.row_ids(state_id)
+        return self.categories[ids].tolist(), self.proportions[state_id, ids].tolist()
+
+    def shared_categories(self, state_id1, state_id2):
+        """Ids of the categories both states have a count and total for, in category order.
+
+        An unknown state (-1) constrains nothing, so only the known state's rows count.
+        """
+        present = [np.isfinite(self.counts[i]) & np.isfinite(self.nobs[i])
+                   for i in (state_id1, state_id2) if i >= 0]
+        if not present:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(np.logical_and.reduce(present))
+
+    def export(self):
+        """(arrays, metadata) for publishing the index in shared memory."""
+        arrays = {"counts": self.counts, "nobs": self.nobs, "proportions": self.proportions,
+                  "row_categories": self.row_categories, "offsets": self.offsets}
+        return arrays, {"states": self.states.tolist(), "categories": self.categories.tolist()}
+
+    @classmethod
+    def restore(cls, arrays, meta):
+        index = cls.__new__(cls)
+        index.states = np.asarray(meta["states"], dtype=object)
+        index.categories = np.asarray(meta["categories"], dtype=object)
+        for key in ("counts", "nobs", "proportions", "row_categories", "offsets"):
+            setattr(index, key, arrays[key])
+        index._build_lookups()
+        return index
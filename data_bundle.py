@@ -0,0 +1,158 @@
+"""Compile the dashboard CSVs into a typed, memory-mappable columnar bundle.
+
+Run ``python data_bundle.py`` after refreshing the CSVs. Each table becomes a
+directory of ``.npy`` column files (categorical codes, narrowest integer dtypes,
+float64 measures) described by ``manifest.json``. Loading maps the columns
+read-only with no parse and no copy; a table whose source CSV changed since the
+build is read from CSV instead.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BUNDLE_DIR = os.environ.get("DASHBOARD_BUNDLE_DIR", "data_bundle")
+BUNDLE_FORMAT = 1
+
+state_abbrev = {
+    "Alabama": "AL","Alaska": "AK","Arizona": "AZ","Arkansas": "AR","California": "CA",
+    "Colorado": "CO","Connecticut": "CT","Delaware": "DE","Florida": "FL","Georgia": "GA",
+    "Hawaii": "HI","Idaho": "ID","Illinois": "IL","Indiana": "IN","Iowa": "IA",
+    "Kansas": "KS","Kentucky": "KY","Louisiana": "LA","Maine": "ME","Maryland": "MD",
+    "Massachusetts": "MA","Michigan": "MI","Minnesota": "MN","Mississippi": "MS",
+    "Missouri": "MO","Montana": "MT","Nebraska": "NE","Nevada": "NV","New Hampshire": "NH",
+    "New Jersey": "NJ","New Mexico": "NM","New York": "NY","North Carolina": "NC",
+    "North Dakota": "ND","Ohio": "OH","Oklahoma": "OK","Oregon": "OR","Pennsylvania": "PA",
+    "Rhode Island": "RI","South Carolina": "SC","South Dakota": "SD","Tennessee": "TN",
+    "Texas": "TX","Utah": "UT","Vermont": "VT","Virginia": "VA","Washington": "WA",
+    "West Virginia": "WV","Wisconsin": "WI","Wyoming": "WY","Washington, D.C.": "DC"
+}
+
+TABLES = {
+    "density": {"source": "DensityMapDataV3.csv", "categorical": ["state_name", "state_abbrev"]},
+    "skills": {"source": "TopAISkillsChartDataV2_with_other.csv", "categorical": ["state_name", "skills_name"]},
+    "career": {"source": "TopAICareerDataV2_with_other.csv", "categorical": ["state_name", "lot_career_area_name"]},
+}
+
+
+def source_fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def read_source(name):
+    """Parse one table straight from its CSV (the slow path)."""
+    df = pd.read_csv(TABLES[name]["source"])
+    if name == "density" and "state_abbrev" not in df.columns:
+        df["state_abbrev"] = df["state_name"].map(state_abbrev)
+    return df
+
+
+def _narrow_int(values):
+    if len(values) == 0:
+        return np.int8
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+
+def encode_column(series, categorical):
+    """(typed array, spec) for one column; ``decode_column`` reverses it without copying."""
+    if categorical:
+        cat = series.astype("category")
+        codes = cat.cat.codes.to_numpy()
+        spec = {"kind": "categorical", "categories": [str(c) for c in cat.cat.categories]}
+        return codes.astype(_narrow_int(codes)), spec
+    if pd.api.types.is_integer_dtype(series.dtype):
+        values = series.to_numpy()
+        return values.astype(_narrow_int(values)), {"kind": "int"}
+    return series.to_numpy(dtype=np.float64), {"kind": "float"}
+
+
+def build_bundle(bundle_dir=BUNDLE_DIR):
+    manifest = {"format": BUNDLE_FORMAT, "tables": {}}
+    for name, table in TABLES.items():
+        df = read_source(name)
+        table_dir = os.path.join(bundle_dir, name)
+        os.makedirs(table_dir, exist_ok=True)
+        columns = []
+        for col in df.columns:
+            values, spec = encode_column(df[col], col in table["categorical"])
+            np.save(os.path.join(table_dir, f"{col}.npy"), values)
+            columns.append(dict(spec, name=col, dtype=values.dtype.str))
+        manifest["tables"][name] = {
+            "source": table["source"],
+            "fingerprint": source_fingerprint(table["source"]),
+            "rows": len(df),
+            "columns": columns,
+        }
+    write_manifest(bundle_dir, manifest)
+    return manifest
+
+
+def write_manifest(directory, manifest):
+    """Atomically write ``directory``/manifest.json.
+
+    Call it last: the manifest is what marks the arrays next to it as complete,
+    so a half-written build is never considered fresh.
+    """
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, "manifest.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(tmp, os.path.join(directory, "manifest.json"))
+
+
+def read_manifest(bundle_dir=BUNDLE_DIR, fmt=BUNDLE_FORMAT):
+    """``bundle_dir``/manifest.json, or None if it is missing, unreadable or of another format."""
+    try:
+        with open(os.path.join(bundle_dir, "manifest.json"), "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == fmt else None
+
+
+def decode_column(values, spec):
+    if spec["kind"] == "categorical":
+        dtype = pd.CategoricalDtype(spec["categories"])
+        values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+    return pd.Series(values, copy=False)
+
+
+def _map_table(bundle_dir, name, entry):
+    columns = {}
+    for spec in entry["columns"]:
+        values = np.load(os.path.join(bundle_dir, name, f"{spec['name']}.npy"), mmap_mode="r")
+        columns[spec["name"]] = decode_column(values, spec)
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_table(name, bundle_dir=BUNDLE_DIR, manifest=None):
+    """Memory-map one table from the bundle, or parse its CSV if the bundle is missing or stale."""
+    manifest = manifest if manifest is not None else read_manifest(bundle_dir)
+    entry = (manifest or {}).get("tables", {}).get(name)
+    try:
+        if entry and entry["fingerprint"] == source_fingerprint(TABLES[name]["source"]):
+            return _map_table(bundle_dir, name, entry)
+    except OSError:
+        pass
+    return read_source(name)
+
+
+def load_datasets(bundle_dir=BUNDLE_DIR):
+    """(density_map_data, top_ai_skills_data, top_ai_career_data)."""
+    manifest = read_manifest(bundle_dir)
+    return tuple(load_table(name, bundle_dir, manifest) for name in ("density", "skills", "career"))
+
+
+if __name__ == "__main__":
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else BUNDLE_DIR
+    built = build_bundle(out_dir)
+    for name, entry in built["tables"].items():
+        print(f"{name}: {entry['rows']} rows -> {os.path.join(out_dir, name)}")
@@ -0,0 +1,227 @@
+import contextlib
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Versioned data snapshots with hot reload
+# =========================
+# A snapshot holds the three tables and every index derived from them. The
+# manager swaps in a new snapshot by rebinding one attribute, so readers see
+# either the old one or the new one, never a mix. Callbacks pin the snapshot
+# they started with, so in-flight requests finish on the old data.
+#
+# pandas/NumPy and the index modules are imported on first load, not at import
+# time, so importing the app (and booting a worker) stays cheap until data is needed.
+
+
+class DataSnapshot:
+    def __init__(self, version, density_map_data, top_ai_skills_data, top_ai_career_data,
+                 region_data=None, **indexes):
+        """Prebuilt ``indexes`` (e.g. attached from shared memory) are used as-is."""
+        self.version = version
+        self.density_map_data = density_map_data
+        self.top_ai_skills_data = top_ai_skills_data
+        self.top_ai_career_data = top_ai_career_data
+        self.region_data = region_data
+
+        from category_index import StateCategoryIndex
+        from density_cube import DensityYearCube
+        from proportion_intervals import ProportionIntervals
+        from proportion_stats import PairwisePValues
+        from region_index import RegionYearIndex
+        from state_similarity import StateSimilarity
+
+        # State × year prefix sums: any slider range is one vectorized subtraction.
+        # (U.S. totals come from summing raw state rows, never a precomputed total column.)
+        self.density_cube = indexes.get("density_cube") or DensityYearCube(density_map_data)
+
+        # Integer-coded state × category arrays: a dropdown pair is two row slices.
+        self.career_index = indexes.get("career_index") or StateCategoryIndex(
+            top_ai_career_data, "lot_career_area_name", "entry_count", "total_jobs")
+        self.skills_index = indexes.get("skills_index") or StateCategoryIndex(
+            top_ai_skills_data, "skills_name", "skill_count", "total_ai_listings")
+
+        # State × state × category p-value tensors: a dropdown pair is a lookup, not a test loop.
+        self.career_pvalues = indexes.get("career_pvalues") or PairwisePValues.from_index(self.career_index)
+        self.skills_pvalues = indexes.get("skills_pvalues") or PairwisePValues.from_index(self.skills_index)
+
+        # Per-cell confidence bounds for the error bars: the batch job's stored
+        # intervals when they match this data, else vectorized Wilson bounds.
+        self.career_intervals = indexes.get("career_intervals") or ProportionIntervals.for_index(
+            self.career_index, "career")
+        self.skills_intervals = indexes.get("skills_intervals") or ProportionIntervals.for_index(
+            self.skills_index, "skills")
+
+        # All-pairs profile similarity with each state's neighbors pre-sorted: top-k is a row slice.
+        self.career_similarity = indexes.get("career_similarity") or StateSimilarity(self.career_index)
+        self.skills_similarity = indexes.get("skills_similarity") or StateSimilarity(self.skills_index)
+
+        # Optional state → metro → county year sums (None when the region table is not installed)
+        self.region_index = indexes.get("region_index")
+        if self.region_index is None and region_data is not None:
+            self.region_index = RegionYearIndex(region_data)
+
+    @classmethod
+    def load(cls, bundle_dir=None, shared=True):
+        """The current snapshot; ``shared=False`` always reads the files (the publishing master)."""
+        # Under gunicorn the master publishes the snapshot in shared memory and republishes
+        # it when the files change (gunicorn.conf.py); workers follow it instead of rebuilding
+        manifest = os.environ.get("DASHBOARD_SHM_MANIFEST") if shared else None
+        if manifest:
+            from shared_data import attach  # imports this module
+            snapshot = attach(manifest)
+            if snapshot is not None:
+                return snapshot
+            logger.warning("Shared data snapshot %s unavailable; loading privately", manifest)
+
+        from data_bundle import BUNDLE_DIR, TABLES, load_datasets
+        from proportion_intervals import MANIFEST as INTERVALS_MANIFEST
+        from region_index import GEOJSON, REGION_DATA, load_region_data
+        sources = [table["source"] for table in TABLES.values()]
+        # The drill-down figures embed the shapes' URL stamps, so replacing a GeoJSON is a new version
+        optional = [path for path in (REGION_DATA, INTERVALS_MANIFEST, *GEOJSON.values()) if os.path.exists(path)]
+        return cls(snapshot_version(sources + optional), *load_datasets(bundle_dir or BUNDLE_DIR),
+                   region_data=load_region_data())
+
+
+def watched_files(bundle_dir=None):
+    # Workers of a shared-memory master watch only its manifest, which is replaced on each republish
+    manifest = os.environ.get("DASHBOARD_SHM_MANIFEST")
+    if manifest:
+        return [manifest]
+    from data_bundle import BUNDLE_DIR, TABLES
+    from proportion_intervals import MANIFEST as INTERVALS_MANIFEST
+    from region_index import GEOJSON, REGION_DATA
+    bundle_dir = bundle_dir or BUNDLE_DIR
+    return ([table["source"] for table in TABLES.values()] + [os.path.join(bundle_dir, "manifest.json")]
+            + [REGION_DATA, INTERVALS_MANIFEST] + list(GEOJSON.values()))
+
+
+def snapshot_version(paths):
+    """Short hash of the data files' (size, mtime) fingerprints.
+
+    These are the fingerprints the bundle and intervals manifests record for their
+    sources, so nothing is read: a fresh bundle still loads without touching the CSVs.
+    """
+    stamps = [[path, size, mtime_ns] for path, size, mtime_ns in _fingerprint(paths)]
+    return hashlib.sha256(json.dumps(stamps).encode("utf-8")).hexdigest()[:16]
+
+
+def _fingerprint(paths):
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps.append((path, st.st_size, st.st_mtime_ns))
+        except OSError:
+            stamps.append((path, None, None))
+    return tuple(stamps)
+
+
+class SnapshotManager:
+    """Nothing is loaded until the first ``current()``/``load()``."""
+
+    def __init__(self, loader=DataSnapshot.load, paths=None, interval=30.0):
+        self.loader = loader
+        self._paths = paths
+        self.interval = interval
+        self._pinned = contextvars.ContextVar("pinned_snapshot", default=None)
+        self._listeners = []
+        self._reload_lock = threading.Lock()
+        self._watcher_pid = None
+        self._stop = threading.Event()
+        self._stamp = None
+        self._current = None
+
+    @property
+    def paths(self):
+        if self._paths is None:
+            self._paths = watched_files()
+        return self._paths
+
+    @property
+    def loaded(self):
+        return self._current is not None
+
+    def load(self):
+        """Load the first snapshot if that has not happened yet; returns the latest one."""
+        if self._current is None:
+            with self._reload_lock:
+                if self._current is None:
+                    self._stamp = _fingerprint(self.paths)
+                    self._current = self.loader()
+        return self._current
+
+    def current(self):
+        """The snapshot pinned for this request, else the latest one."""
+        return self._pinned.get() or self._current or self.load()
+
+    @contextlib.contextmanager
+    def pin(self, snapshot=None):
+        token = self._pinned.set(snapshot or self._current or self.load())
+        try:
+            yield self._pinned.get()
+        finally:
+            self._pinned.reset(token)
+
+    def pinned_call(self, func):
+        """Decorator: run ``func`` (and any cache lookup inside it) against one snapshot."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.pin():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def on_swap(self, listener):
+        """Call ``listener(snapshot)`` after each successful swap."""
+        self._listeners.append(listener)
+        return listener
+
+    def reload(self, force=False):
+        """Rebuild if the watched files changed; returns True when a new snapshot was swapped in."""
+        if self._current is None:
+            self.load()
+            return True
+        with self._reload_lock:
+            stamp = _fingerprint(self.paths)
+            if stamp == self._stamp and not force:
+                return False
+            try:
+                snapshot = self.loader()
+            except Exception:
+                # Half-written files etc.: keep serving the old snapshot, retry next poll
+                logger.exception("Data reload failed; keeping snapshot %s", self._current.version)
+                return False
+            self._stamp = stamp
+            if snapshot.version == self._current.version and not force:
+                return False
+            self._current = snapshot
+        logger.info("Swapped in data snapshot %s", snapshot.version)
+        for listener in self._listeners:
+            try:
+                with self.pin(snapshot):
+                    listener(snapshot)
+            except Exception:
+                logger.exception("Snapshot listener failed")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.reload()
+
+    def start_watching(self):
+        """Start the background poller once per process (safe to call again after fork)."""
+        if self.interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, name="data-snapshot-watcher", daemon=True).start()
+
+    def stop_watching(self):
+        self._stop.set()
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# State × year prefix sums for the density map
+# =========================
+# Built once at load. Any contiguous year range is then answered with one
+# subtraction per array instead of a filter + groupby per slider move.
+# The helpers below are shared with the drill-down index (region_index.py).
+
+
+def prefix_sums(values):
+    """Cumulative sums along the year axis with a leading zero column, so that
+    sum(start..end) == cum[:, end + 1] - cum[:, start]."""
+    return np.pad(values.cumsum(axis=1), ((0, 0), (1, 0)))
+
+
+def year_bounds(cum, min_year, start_year, end_year):
+    """(lo, hi) prefix-sum columns for [start_year, end_year], clamped to the years in ``cum``."""
+    n_years = cum.shape[1] - 1
+    lo = min(max(int(start_year) - min_year, 0), n_years)
+    hi = min(max(int(end_year) - min_year + 1, 0), n_years)
+    return lo, max(lo, hi)
+
+
+def range_totals(cum, lo, hi, rows=slice(None)):
+    """Per-row sums over the prefix-sum columns [lo, hi)."""
+    return cum[rows, hi] - cum[rows, lo]
+
+
+def metric_values(metric, ai_jobs, all_jobs, us_total):
+    """The density metric per row (NaN where undefined): the AI share of the row's own
+    jobs for ``state_share``, else its share of the U.S. AI total."""
+    ai_jobs = np.asarray(ai_jobs, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if metric == "state_share":
+            all_jobs = np.asarray(all_jobs, dtype=float)
+            return np.where(all_jobs > 0, ai_jobs / all_jobs, np.nan)
+        if us_total > 0:
+            return ai_jobs / us_total
+    return np.full(len(ai_jobs), np.nan)
+
+
+class DensityYearCube:
+    def __init__(self, df):
+        years = df["year"].dropna().astype(int)
+        self.min_year = int(years.min()) if len(years) else 0
+        self.max_year = int(years.max()) if len(years) else 0
+        n_years = self.max_year - self.min_year + 1 if len(years) else 0
+
+        states = (df[["state_name", "state_abbrev"]]
+                  .drop_duplicates("state_name")
+                  .sort_values("state_name"))
+        self.state_names = states["state_name"].to_numpy(dtype=object)
+        self.state_abbrevs = states["state_abbrev"].to_numpy(dtype=object)
+        # Rows without an abbreviation can't be drawn, but still count toward the U.S. total
+        self.mappable = states["state_abbrev"].notna().to_numpy()
+
+        rows = df.dropna(subset=["year"])
+        state_pos = pd.Index(self.state_names).get_indexer(rows["state_name"])
+        year_pos = rows["year"].astype(int).to_numpy() - self.min_year
+
+        ai = np.zeros((len(self.state_names), n_years), dtype=np.int64)
+        all_jobs = np.zeros_like(ai)
+        present = np.zeros_like(ai)
+        np.add.at(ai, (state_pos, year_pos), rows["ai_jobs_count"].fillna(0).to_numpy(dtype=np.int64))
+        np.add.at(all_jobs, (state_pos, year_pos), rows["all_jobs_state_year"].fillna(0).to_numpy(dtype=np.int64))
+        np.add.at(present, (state_pos, year_pos), 1)
+
+        self.ai_cum = prefix_sums(ai)
+        self.all_cum = prefix_sums(all_jobs)
+        self.rows_cum = prefix_sums(present)
+
+    @property
+    def years(self):
+        return list(range(self.min_year, self.max_year + 1)) if self.ai_cum.shape[1] > 1 else []
+
+    def range_sums(self, start_year, end_year):
+        """Per-state AI and all-job sums over [start_year, end_year] plus the U.S. AI total.
+
+        Only states that have at least one row in the range and a map abbreviation
+        are returned, in state-name order (matching the old groupby output).
+        """
+        lo, hi = year_bounds(self.ai_cum, self.min_year, start_year, end_year)
+        ai = range_totals(self.ai_cum, lo, hi)
+        all_jobs = range_totals(self.all_cum, lo, hi)
+        has_rows = range_totals(self.rows_cum, lo, hi) > 0
+
+        us_total = int(ai[has_rows].sum())
+        keep = has_rows & self.mappable
+        return pd.DataFrame({
+            "state_name": self.state_names[keep],
+            "state_abbrev": self.state_abbrevs[keep],
+            "ai_jobs_count": ai[keep],
+            "all_jobs_state_year": all_jobs[keep],
+        }), us_total
+
+    def metric(self, metric, start_year, end_year):
+        """Range sums with the selected metric in a ``value`` column (NaN where undefined)."""
+        state_agg, us_total = self.range_sums(start_year, end_year)
+        state_agg["value"] = metric_values(metric, state_agg["ai_jobs_count"].to_numpy(),
+                                           state_agg["all_jobs_state_year"].to_numpy(), us_total)
+        return state_agg, us_total
+
+    def client_payload(self):
+        """Compact per-state, per-year arrays for recomputing ranges in the browser."""
+        return {
+            "min_year": self.min_year,
+            "names": self.state_names.tolist(),
+            "abbrevs": [a if isinstance(a, str) else None for a in self.state_abbrevs],
+            "ai": np.diff(self.ai_cum, axis=1).tolist(),
+            "all": np.diff(self.all_cum, axis=1).tolist(),
+            "rows": np.diff(self.rows_cum, axis=1).tolist(),
+        }
+
+    def export(self):
+        """(arrays, metadata) for publishing the cube in shared memory."""
+        arrays = {"ai_cum": self.ai_cum, "all_cum": self.all_cum, "rows_cum": self.rows_cum,
+                  "mappable": self.mappable}
+        meta = {"min_year": self.min_year, "max_year": self.max_year,
+                "state_names": self.state_names.tolist(),
+                "state_abbrevs": [a if isinstance(a, str) else None for a in self.state_abbrevs]}
+        return arrays, meta
+
+    @classmethod
+    def restore(cls, arrays, meta):
+        """Rebuild a cube around existing (e.g. shared, read-only) arrays without copying them."""
+        cube = cls.__new__(cls)
+        cube.min_year, cube.max_year = meta["min_year"], meta["max_year"]
+        cube.state_names = np.array(meta["state_names"], dtype=object)
+        cube.state_abbrevs = np.array(meta["state_abbrevs"], dtype=object)
+        cube.mappable = arrays["mappable"]
+        cube.ai_cum, cube.all_cum, cube.rows_cum = arrays["ai_cum"], arrays["all_cum"], arrays["rows_cum"]
+        return cube
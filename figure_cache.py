@@ -0,0 +1,243 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import plotly
+from plotly.utils import PlotlyJSONEncoder
+
+from instrumentation import stage
+from single_flight import SingleFlight, file_lock
+
+# =========================
+# Two-tier figure cache
+# =========================
+# Tier 1: bounded LRU per worker process. Tier 2: JSON files in a directory
+# shared by every gunicorn worker on the node. Keys are the callback name, its
+# inputs, the dataset version and a fingerprint of the code that builds the
+# figures, so neither a data refresh nor a deploy serves stale figures.
+# ``version`` may be a callable (e.g. the current data snapshot's version).
+# Disk entries live under ``<data version>-<code version>/``; ``prune()`` drops
+# the directories (figures and lock files) of versions no longer served. Every
+# worker reads and writes the same directories, so one owner prunes: the
+# gunicorn master after each publish, or a standalone process on its own swaps.
+#
+# Misses are coalesced: identical concurrent requests in a worker share one
+# computation, and with a disk tier a per-key lock file makes other workers
+# wait for that result instead of computing it again (see single_flight.py).
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "figures")
+# Bump when the cached payload format changes
+CACHE_FORMAT = 1
+_TIER_NAME = re.compile(r"[0-9a-f]{16}(-[0-9a-f]{16})?")
+# Modules whose code shapes the figures; their hash scopes the disk tier
+FIGURE_CODE_FILES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name) for name in (
+    "NewDashboardFile.py", "density_cube.py", "category_index.py", "proportion_stats.py",
+    "proportion_intervals.py", "region_index.py")]
+
+
+def data_version(paths):
+    """Short content hash of the source data files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def code_version(paths):
+    """Short hash of the modules that build figures, the Plotly version and the cache format."""
+    raw = json.dumps([data_version(paths), plotly.__version__, CACHE_FORMAT])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _last_write(path):
+    """Newest mtime of a version directory and its per-callback directories."""
+    stamps = []
+    try:
+        targets = [path] + [entry.path for entry in os.scandir(path) if entry.is_dir()]
+    except OSError:
+        targets = [path]
+    for target in targets:
+        try:
+            stamps.append(os.stat(target).st_mtime)
+        except OSError:
+            pass
+    return max(stamps, default=0.0)
+
+
+class FigureCache:
+    def __init__(self, version, maxsize=256, cache_dir=DEFAULT_CACHE_DIR, lock_timeout=30.0,
+                 code_version=None):
+        self._version = version
+        self.code_version = code_version
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir or None
+        self.lock_timeout = lock_timeout
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0,
+                         "coalesced": 0, "worker_waits": 0}
+
+    @property
+    def version(self):
+        return self._version() if callable(self._version) else self._version
+
+    def _tier(self, version):
+        # What keys and disk directories are scoped to: the data and the code that built the figure
+        return f"{version}-{self.code_version}" if self.code_version else version
+
+    def _key(self, name, version, args):
+        raw = json.dumps([name, version, args], default=str, sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, name, version, key, suffix=".json"):
+        return os.path.join(self.cache_dir, version, name, key + suffix)
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def _read_disk(self, name, version, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(name, version, key), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, name, version, key, payload):
+        if not self.cache_dir:
+            return
+        path = self._path(name, version, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so other workers never read a partial file
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _lookup_memory(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self._memory[key]
+        return None
+
+    def get_or_compute(self, name, args, compute):
+        version = self._tier(self.version)
+        key = self._key(name, version, args)
+        value = self._lookup_memory(key)
+        if value is not None:
+            return value
+        # Concurrent identical misses in this process wait for the first one
+        value, shared = self._inflight.do(key, lambda: self._load_or_compute(name, version, key, compute))
+        if shared:
+            self._count("coalesced")
+        return value
+
+    def _load_or_compute(self, name, version, key, compute):
+        # A caller that just finished may have filled memory between our check and the flight
+        value = self._lookup_memory(key)
+        if value is not None:
+            return value
+
+        value = self._read_disk(name, version, key)
+        if value is not None:
+            self._count("disk_hits")
+        elif not self.cache_dir:
+            value = self._compute(name, version, key, compute)
+        else:
+            # Across workers: one holds the key's lock and computes, the others then read its file
+            with file_lock(self._path(name, version, key, ".lock"), self.lock_timeout) as waited:
+                value = self._read_disk(name, version, key) if waited else None
+                if value is not None:
+                    self._count("disk_hits")
+                    self._count("worker_waits")
+                else:
+                    value = self._compute(name, version, key, compute)
+
+        self._remember(key, value)
+        return value
+
+    def _compute(self, name, version, key, compute):
+        self._count("misses")
+        figure = compute()
+        with stage("serialize"):
+            payload = json.dumps(figure, cls=PlotlyJSONEncoder)
+        self._write_disk(name, version, key, payload)
+        return json.loads(payload)
+
+    def memoize(self, name):
+        """Decorator caching a figure callback on its (JSON-able) positional inputs."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                return self.get_or_compute(name, list(args), lambda: func(*args))
+            wrapper.uncached = func
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            hits = sum(self.counters[c] for c in ("memory_hits", "disk_hits", "coalesced"))
+            lookups = hits + self.counters["misses"]
+            return dict(self.counters, version=self.version, size=len(self._memory),
+                        maxsize=self.maxsize, hit_rate=(hits / lookups) if lookups else None)
+
+    def prune(self, live_versions=None, stale_after=None):
+        """Remove disk entries and lock files of versions no longer served; returns the
+        directories removed.
+
+        Directories of this code version are removed unless their data version is in
+        ``live_versions`` (default: the current one). Directories of other code versions
+        (the other side of a rolling deploy) are removed only when ``stale_after`` is
+        given and nothing was written to them for that many seconds. Only directories
+        named like a version are touched, whatever else is in ``cache_dir``.
+        """
+        if not self.cache_dir:
+            return []
+        if live_versions is None:
+            live_versions = [self.version]
+        live = {self._tier(version) for version in live_versions}
+        try:
+            entries = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+        removed = []
+        for entry in entries:
+            if entry in live or not _TIER_NAME.fullmatch(entry):
+                continue
+            path = os.path.join(self.cache_dir, entry)
+            own_code = entry.endswith(f"-{self.code_version}") if self.code_version else "-" not in entry
+            if not own_code:
+                if stale_after is None or time.time() - _last_write(path) < stale_after:
+                    continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(entry)
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
@@ -0,0 +1,92 @@
+"""gunicorn settings for the dashboard.
+
+    gunicorn -c gunicorn.conf.py NewDashboardFile:server
+
+The master loads the data snapshot once and publishes it in shared memory
+(shared_data.py); workers attach to it instead of each parsing the data and
+building their own indexes. Leave ``preload_app`` off: with it the app would be
+imported before ``on_starting`` publishes the segment.
+
+The master also polls the data files every DASHBOARD_RELOAD_INTERVAL seconds
+(and checks them on SIGHUP). A change is loaded once, in the master, and
+republished under the same manifest path; workers watch the manifest and
+re-attach, so memory per worker stays flat across reloads too.
+
+After each publish the master prunes the shared figure cache: data versions
+older than the previous snapshot go at once, and directories of other code
+versions once idle for DASHBOARD_CACHE_GRACE seconds (default one day), so a
+rolling deploy's old workers keep theirs. Workers never prune.
+"""
+import os
+
+bind = os.environ.get("DASHBOARD_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("DASHBOARD_THREADS", "1"))
+
+_snapshots = None
+_shared = None
+_previous = None
+
+
+def _publish(snapshot, log):
+    global _shared, _previous
+    from shared_data import SharedSnapshot
+
+    shared = SharedSnapshot(snapshot, _shared.manifest_path if _shared else None)
+    # Workers that read the old manifest may still be attaching to the segment it
+    # names, so the one before that is the oldest that can go
+    if _previous is not None:
+        _previous.unlink(remove_manifest=False)
+    _previous, _shared = _shared, shared
+    log.info("Published data snapshot %s in shared memory (%s)", shared.version, shared.shm.name)
+    _prune_figure_cache(log)
+
+
+def _prune_figure_cache(log):
+    from figure_cache import DEFAULT_CACHE_DIR, FIGURE_CODE_FILES, FigureCache, code_version
+
+    cache = FigureCache(None, cache_dir=os.environ.get("DASHBOARD_CACHE_DIR", DEFAULT_CACHE_DIR),
+                        code_version=code_version(FIGURE_CODE_FILES))
+    # Workers still pinned to the previous snapshot keep reading its figures
+    live = [shared.version for shared in (_previous, _shared) if shared is not None]
+    removed = cache.prune(live, stale_after=float(os.environ.get("DASHBOARD_CACHE_GRACE", "86400")))
+    if removed:
+        log.info("Pruned %d stale figure cache version(s)", len(removed))
+
+
+def on_starting(server):
+    from data_snapshot import DataSnapshot, SnapshotManager, watched_files
+
+    global _snapshots
+    # Paths are resolved before DASHBOARD_SHM_MANIFEST is set: the master watches the data files
+    _snapshots = SnapshotManager(loader=lambda: DataSnapshot.load(shared=False), paths=watched_files(),
+                                 interval=float(os.environ.get("DASHBOARD_RELOAD_INTERVAL", "30")))
+    _publish(_snapshots.load(), server.log)
+    _snapshots.on_swap(lambda snapshot: _publish(snapshot, server.log))
+    # Inherited by every worker forked from here on, including max_requests recycles
+    os.environ["DASHBOARD_SHM_MANIFEST"] = _shared.manifest_path
+
+
+def post_fork(server, worker):
+    # Workers attach through the manifest; the master's mappings inherited by fork
+    # would otherwise keep replaced segments alive in every worker
+    for shared in (_shared, _previous):
+        if shared is not None:
+            shared.shm.close()
+
+
+def when_ready(server):
+    _snapshots.start_watching()
+
+
+def on_reload(server):
+    _snapshots.reload()
+
+
+def on_exit(server):
+    if _snapshots is not None:
+        _snapshots.stop_watching()
+    if _previous is not None:
+        _previous.unlink(remove_manifest=False)
+    if _shared is not None:
+        _shared.unlink()
@@ -0,0 +1,159 @@
+"""Regenerate the dashboard CSVs from a raw job-postings extract.
+
+The raw file has one row per posting with a state, a year, a career area, a
+delimited skills list and an AI flag. It is streamed in fixed-size chunks; each
+chunk is reduced to small count tables (state × year, state × career area,
+state × skill) that merge by addition, so memory is bounded by the number of
+distinct keys, not by the file size. Chunks can be reduced in a process pool.
+
+    python ingest.py postings.csv --out-dir . --workers 8
+"""
+import argparse
+import csv
+import os
+
+import pandas as pd
+
+from category_index import OTHER_CATEGORY
+from data_bundle import TABLES
+from parallel import imap_bounded
+
+DEFAULT_COLUMNS = {
+    "state": "state_name",
+    "year": "year",
+    "career": "lot_career_area_name",
+    "skills": "skills_name",
+    "is_ai": "is_ai",
+}
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+
+
+class PartialAggregates:
+    """Count tables for a slice of postings; ``merge`` combines two slices."""
+
+    def __init__(self, all_jobs=None, ai_jobs=None, careers=None, skills=None):
+        self.all_jobs = all_jobs if all_jobs is not None else pd.Series(dtype="int64")
+        self.ai_jobs = ai_jobs if ai_jobs is not None else pd.Series(dtype="int64")
+        self.careers = careers if careers is not None else pd.Series(dtype="int64")
+        self.skills = skills if skills is not None else pd.Series(dtype="int64")
+
+    def merge(self, other):
+        def add(a, b):
+            if a.empty:
+                return b
+            if b.empty:
+                return a
+            return a.add(b, fill_value=0).astype("int64")
+
+        return PartialAggregates(add(self.all_jobs, other.all_jobs), add(self.ai_jobs, other.ai_jobs),
+                                 add(self.careers, other.careers), add(self.skills, other.skills))
+
+
+def _as_bool(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series.fillna(False)
+    return series.astype(str).str.strip().str.lower().isin(TRUE_VALUES)
+
+
+def reduce_chunk(chunk, columns=DEFAULT_COLUMNS, skills_sep=";"):
+    """Reduce one chunk of raw postings to mergeable count tables."""
+    state, year, career, skills = columns["state"], columns["year"], columns["career"], columns["skills"]
+    chunk = chunk.dropna(subset=[state, year])
+    chunk = chunk.assign(**{year: pd.to_numeric(chunk[year], errors="coerce")}).dropna(subset=[year])
+    chunk[year] = chunk[year].astype("int64")
+    ai = chunk[_as_bool(chunk[columns["is_ai"]])]
+
+    skill_rows = (ai[[state, skills]].dropna()
+                  .assign(**{skills: lambda df: df[skills].astype(str).str.split(skills_sep)})
+                  .explode(skills))
+    skill_rows[skills] = skill_rows[skills].str.strip()
+    skill_rows = skill_rows[skill_rows[skills] != ""]
+
+    return PartialAggregates(
+        all_jobs=chunk.groupby([state, year]).size(),
+        ai_jobs=ai.groupby([state, year]).size(),
+        careers=ai.dropna(subset=[career]).groupby([state, career]).size(),
+        skills=skill_rows.groupby([state, skills]).size(),
+    )
+
+
+def _top_n_with_other(counts, totals, n, category_col, count_col, total_col):
+    """Top ``n`` categories per state (ties at the cut kept) plus an "Other" rollup row."""
+    df = counts.rename(count_col).reset_index()
+    df.columns = ["state_name", category_col, count_col]
+    rank = df.groupby("state_name")[count_col].rank(method="min", ascending=False)
+    top = df[rank <= n]
+    rest = df[rank > n].groupby("state_name", as_index=False)[count_col].sum()
+    rest = rest[rest[count_col] > 0].assign(**{category_col: OTHER_CATEGORY})
+
+    top = top.sort_values(["state_name", count_col, category_col], ascending=[True, False, True])
+    out = pd.concat([top, rest.sort_values("state_name")[top.columns]], ignore_index=True)
+    out[total_col] = out["state_name"].map(totals).astype("int64")
+    out["proportion"] = out[count_col] / out[total_col]
+    return out[["state_name", category_col, count_col, total_col, "proportion"]]
+
+
+def finalize(partial, top_careers=12, top_skills=10):
+    """Turn merged counts into the three tables the dashboard reads."""
+    all_jobs = partial.all_jobs.rename("all_jobs_state_year")
+    ai_jobs = partial.ai_jobs.reindex(all_jobs.index, fill_value=0).rename("ai_jobs_count")
+    density = pd.concat([ai_jobs, all_jobs], axis=1).reset_index()
+    density.columns = ["state_name", "year", "ai_jobs_count", "all_jobs_state_year"]
+    us_ai_year = density.groupby("year")["ai_jobs_count"].transform("sum")
+    density["percent"] = density["ai_jobs_count"] / us_ai_year * 100
+    density["state_ai_share_within_state"] = density["ai_jobs_count"] / density["all_jobs_state_year"]
+    density = density.sort_values(["state_name", "year"], ignore_index=True)[
+        ["state_name", "year", "ai_jobs_count", "percent", "all_jobs_state_year", "state_ai_share_within_state"]]
+
+    # Career shares are per AI posting; skill shares are per skill mention
+    ai_postings = partial.ai_jobs.groupby(level=0).sum()
+    career = _top_n_with_other(partial.careers, ai_postings, top_careers,
+                               "lot_career_area_name", "entry_count", "total_jobs")
+    skill_mentions = partial.skills.groupby(level=0).sum()
+    skills = _top_n_with_other(partial.skills, skill_mentions, top_skills,
+                               "skills_name", "skill_count", "total_ai_listings")
+    return {"density": density, "career": career, "skills": skills}
+
+
+def aggregate_file(path, chunksize=1_000_000, workers=1, columns=DEFAULT_COLUMNS, skills_sep=";"):
+    """Stream ``path`` in chunks and return the merged PartialAggregates."""
+    reader = pd.read_csv(path, usecols=list(columns.values()), chunksize=chunksize,
+                         dtype={columns["state"]: str, columns["career"]: str, columns["skills"]: str})
+    total = PartialAggregates()
+    # At most two chunks per worker in flight keeps the parent's memory bounded too
+    for partial in imap_bounded(reduce_chunk, ((chunk, columns, skills_sep) for chunk in reader), workers):
+        total = total.merge(partial)
+    return total
+
+
+def write_tables(tables, out_dir="."):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, df in tables.items():
+        path = os.path.join(out_dir, TABLES[name]["source"])
+        if name == "density":
+            df.to_csv(path, index=False)
+        else:
+            df.to_csv(path, index=False, quoting=csv.QUOTE_NONNUMERIC)
+        print(f"{name}: {len(df)} rows -> {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("raw", help="raw postings CSV (one row per posting)")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skills-sep", default=";")
+    parser.add_argument("--top-careers", type=int, default=12)
+    parser.add_argument("--top-skills", type=int, default=10)
+    for key, default in DEFAULT_COLUMNS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}-column", dest=f"{key}_column", default=default)
+    args = parser.parse_args(argv)
+
+    columns = {key: getattr(args, f"{key}_column") for key in DEFAULT_COLUMNS}
+    partial = aggregate_file(args.raw, args.chunksize, args.workers, columns, args.skills_sep)
+    write_tables(finalize(partial, args.top_careers, args.top_skills), args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import bisect
+import contextlib
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+
+import flask
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Callback instrumentation + Prometheus /metrics
+# =========================
+# Each instrumented callback records its total time and, through ``stage()``,
+# the time spent in aggregate / statistics / figure / serialize steps. The
+# Flask hooks add per-output response bytes and dispatch time, which includes
+# Dash's own JSON serialization of the response.
+#
+# Label sets are bounded so worker memory and /metrics stay flat however many
+# input combinations users try: each callback counts its first
+# ``max_input_labels`` distinct inputs individually and everything after that
+# under inputs="other". Response outputs are capped the same way, since the
+# output name comes from the request body.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6)
+
+OTHER = "other"
+
+_current = contextvars.ContextVar("instrumented_callback", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def _labels(**labels):
+    def esc(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return ",".join(f'{k}="{esc(v)}"' for k, v in labels.items())
+
+
+class CallbackMetrics:
+    def __init__(self, slow_seconds=0.5, profile_rate=0.0, max_input_labels=20, max_output_labels=100):
+        self.slow_seconds = slow_seconds
+        self.profile_rate = profile_rate
+        self.max_input_labels = max_input_labels
+        self.max_output_labels = max_output_labels
+        self._lock = threading.Lock()
+        self.durations = {}     # callback -> Histogram
+        self.stages = {}        # (callback, stage) -> Histogram
+        self.requests = {}      # callback -> {inputs json or OTHER: count}
+        self.errors = {}        # callback -> count
+        self.response_bytes = {}  # output -> Histogram
+        self.dispatch = {}      # output -> Histogram
+        self._collectors = []
+
+    def _observe(self, table, key, value, buckets=LATENCY_BUCKETS, limit=None):
+        with self._lock:
+            if key not in table and limit is not None and len(table) >= limit:
+                key = OTHER
+            hist = table.get(key)
+            if hist is None:
+                hist = table[key] = Histogram(buckets)
+            hist.observe(value)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time one step of the running callback (no-op outside an instrumented call)."""
+        state = _current.get()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if state is not None:
+                elapsed = time.perf_counter() - start
+                state["stages"][name] = state["stages"].get(name, 0.0) + elapsed
+                self._observe(self.stages, (state["callback"], name), elapsed)
+
+    def instrument(self, name):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                inputs = json.dumps(list(args), default=str)
+                with self._lock:
+                    counts = self.requests.setdefault(name, {})
+                    key = inputs if inputs in counts or len(counts) < self.max_input_labels else OTHER
+                    counts[key] = counts.get(key, 0) + 1
+                state = {"callback": name, "stages": {}}
+                token = _current.set(state)
+                profiler = cProfile.Profile() if random.random() < self.profile_rate else None
+                start = time.perf_counter()
+                try:
+                    if profiler is not None:
+                        return profiler.runcall(func, *args)
+                    return func(*args)
+                except Exception:
+                    with self._lock:
+                        self.errors[name] = self.errors.get(name, 0) + 1
+                    raise
+                finally:
+                    elapsed = time.perf_counter() - start
+                    _current.reset(token)
+                    self._observe(self.durations, name, elapsed)
+                    if elapsed >= self.slow_seconds:
+                        self._log_slow(name, inputs, elapsed, state["stages"], profiler)
+            return wrapper
+        return decorator
+
+    def _log_slow(self, name, inputs, elapsed, stages, profiler):
+        breakdown = ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in stages.items())
+        message = f"Slow callback {name}{inputs}: {elapsed * 1000:.1f}ms ({breakdown or 'no stages'})"
+        if profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+            message += "\n" + out.getvalue()
+        logger.warning(message)
+
+    def add_collector(self, collector):
+        """``collector()`` returns extra exposition lines (e.g. cache counters)."""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+
+        def histogram(metric, help_text, table, label_names):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for key, hist in sorted(table.items()):
+                labels = dict(zip(label_names, key if isinstance(key, tuple) else (key,)))
+                running = 0
+                for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                    running += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{metric}_bucket{{{_labels(**labels, le=le)}}} {running}")
+                lines.append(f"{metric}_sum{{{_labels(**labels)}}} {hist.sum}")
+                lines.append(f"{metric}_count{{{_labels(**labels)}}} {running}")
+
+        with self._lock:
+            histogram("dashboard_callback_duration_seconds", "Callback wall time.",
+                      self.durations, ("callback",))
+            histogram("dashboard_callback_stage_duration_seconds", "Time per callback stage.",
+                      self.stages, ("callback", "stage"))
+            histogram("dashboard_response_bytes", "Dash update response size per output.",
+                      self.response_bytes, ("output",))
+            histogram("dashboard_dispatch_duration_seconds",
+                      "Dash update request time per output, including response serialization.",
+                      self.dispatch, ("output",))
+            lines.append("# HELP dashboard_callback_requests_total Callback calls per input combination "
+                         "(the first few per callback; the rest are inputs=\"other\").")
+            lines.append("# TYPE dashboard_callback_requests_total counter")
+            for name, counts in sorted(self.requests.items()):
+                for inputs, count in sorted(counts.items()):
+                    lines.append(f"dashboard_callback_requests_total{{{_labels(callback=name, inputs=inputs)}}} {count}")
+            lines.append("# HELP dashboard_callback_errors_total Callback calls that raised.")
+            lines.append("# TYPE dashboard_callback_errors_total counter")
+            for name, count in sorted(self.errors.items()):
+                lines.append(f"dashboard_callback_errors_total{{{_labels(callback=name)}}} {count}")
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def register(self, server):
+        """Add ``/metrics`` and the Dash update request hooks to a Flask server."""
+        @server.before_request
+        def _start_timer():
+            flask.g.metrics_start = time.perf_counter()
+
+        @server.after_request
+        def _record_response(response):
+            if flask.request.path.endswith("/_dash-update-component") and not response.direct_passthrough:
+                body = flask.request.get_json(silent=True) or {}
+                output = body.get("output", "unknown")
+                self._observe(self.response_bytes, output, len(response.get_data()), BYTES_BUCKETS,
+                              limit=self.max_output_labels)
+                start = getattr(flask.g, "metrics_start", None)
+                if start is not None:
+                    self._observe(self.dispatch, output, time.perf_counter() - start, limit=self.max_output_labels)
+            return response
+
+        @server.route("/metrics")
+        def _metrics():
+            return flask.Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+
+metrics = CallbackMetrics(
+    slow_seconds=float(os.environ.get("DASHBOARD_SLOW_CALLBACK_SECONDS", "0.5")),
+    profile_rate=float(os.environ.get("DASHBOARD_PROFILE_SAMPLE_RATE", "0")),
+    max_input_labels=int(os.environ.get("DASHBOARD_METRICS_MAX_INPUTS", "20")),
+)
+stage = metrics.stage
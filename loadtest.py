@@ -0,0 +1,489 @@
+"""Concurrent-user load test against a locally launched gunicorn server.
+
+For each configuration in the matrix (workers × threads × worker class × user
+count) the app is started with gunicorn.conf.py on a free local port, and N
+simulated users replay Dash sessions against it: a page load, then tab
+switches, year-slider drags, state-dropdown churn and multi-state selections,
+each as the ``_dash-update-component`` POSTs the browser would send, with
+think time in between. Throughput and latency percentiles are reported per
+configuration and per request type.
+
+    python loadtest.py --workers 1,2,4 --threads 1,4 --worker-class sync,gthread --users 8,32
+    python loadtest.py --url http://10.0.0.5:8050 --users 64   # an already-running server
+
+The load generator shares the machine with the server when gunicorn is
+launched here, so leave it CPU headroom (or use ``--url`` from another host)
+when sizing for production. Each configuration gets a fresh disk figure cache
+and a warm-up period that is not measured.
+"""
+import argparse
+import http.client
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TABS = ("tab1", "tab2", "tab3")
+COMPARISON_KINDS = ("career", "skills")
+METRICS = ("state_share", "national_share")
+# Relative frequency of each user action after the page load
+ACTIONS = {"tab_switch": 2, "slider_drag": 3, "dropdown_churn": 4, "multi_select": 1}
+
+
+def _csv(cast):
+    return lambda text: [cast(item) for item in text.split(",") if item]
+
+
+# =========================
+# Dash request payloads
+# =========================
+def output_key(outputs):
+    """Dash's string for a callback's outputs, as listed in ``/_dash-dependencies``."""
+    if len(outputs) == 1:
+        return "{}.{}".format(*outputs[0])
+    return ".." + "...".join(f"{i}.{p}" for i, p in outputs) + ".."
+
+
+def update_body(outputs, inputs, state=()):
+    """JSON body of one ``_dash-update-component`` POST.
+
+    ``outputs`` is [(id, prop)]; ``inputs`` and ``state`` are [(id, prop, value)].
+    The first input is reported as the one that changed.
+    """
+    if len(outputs) == 1:
+        outputs_field = {"id": outputs[0][0], "property": outputs[0][1]}
+    else:
+        outputs_field = [{"id": i, "property": p} for i, p in outputs]
+    return json.dumps({
+        "output": output_key(outputs),
+        "outputs": outputs_field,
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in state],
+        "changedPropIds": [f"{inputs[0][0]}.{inputs[0][1]}"],
+    })
+
+
+def find_component(tree, component_id):
+    """Props of the component with ``component_id`` in a serialized layout, or None."""
+    if isinstance(tree, dict):
+        props = tree.get("props")
+        if isinstance(props, dict) and props.get("id") == component_id:
+            return props
+        return next((found for value in tree.values()
+                     if (found := find_component(value, component_id)) is not None), None)
+    if isinstance(tree, list):
+        return next((found for value in tree if (found := find_component(value, component_id)) is not None), None)
+    return None
+
+
+class SessionSpec:
+    """What the simulated users can pick from, discovered from the running app."""
+
+    def __init__(self, server_outputs, years, states, defaults):
+        self.server_outputs = server_outputs
+        self.years = years
+        self.states = states
+        self.defaults = defaults
+
+    @classmethod
+    def discover(cls, client):
+        status, body = client.request("GET", "/_dash-dependencies")
+        if status != 200:
+            raise RuntimeError(f"/_dash-dependencies returned {status}")
+        # Clientside callbacks never reach the server, so their requests are not replayed
+        server_outputs = {dep["output"] for dep in json.loads(body) if not dep.get("clientside_function")}
+        layouts = {}
+        for tab in TABS:
+            status, body = client.request("POST", "/_dash-update-component",
+                                          update_body([("tabs-content", "children")], [("tabs", "value", tab)]))
+            if status != 200:
+                raise RuntimeError(f"rendering {tab} returned {status}")
+            layouts[tab] = json.loads(body)
+        slider = find_component(layouts["tab1"], "density_years") or {}
+        years = list(range(slider.get("min", 2015), slider.get("max", 2023) + 1))
+        states, defaults = {}, {}
+        for kind, tab in zip(COMPARISON_KINDS, ("tab2", "tab3")):
+            dropdown = find_component(layouts[tab], f"{kind}_state_1") or {}
+            states[kind] = [o["value"] if isinstance(o, dict) else o for o in dropdown.get("options", [])]
+            multi = find_component(layouts[tab], f"{kind}_states_multi") or {}
+            defaults[kind] = {"state1": dropdown.get("value"),
+                              "state2": (find_component(layouts[tab], f"{kind}_state_2") or {}).get("value"),
+                              "multi": multi.get("value") or []}
+        return cls(server_outputs, years, states, defaults)
+
+
+# =========================
+# Simulated users
+# =========================
+class Client:
+    """One keep-alive HTTP connection (reopened after errors and ``Connection: close``)."""
+
+    def __init__(self, url, timeout=60.0):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method, path, body=None):
+        headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip"} if body else {}
+        # The server may have closed an idle keep-alive connection; like a browser,
+        # resend once on a new connection
+        reused = self.conn is not None
+        while True:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                return response.status, response.read()
+            except (ConnectionResetError, BrokenPipeError, http.client.RemoteDisconnected):
+                self.close()
+                if not reused:
+                    raise
+                reused = False
+            except (OSError, http.client.HTTPException):
+                self.close()
+                raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class User(threading.Thread):
+    """Closed-loop user: one session after another until the run ends."""
+
+    def __init__(self, url, spec, recorder, stop, seed, think):
+        super().__init__(daemon=True)
+        self.client = Client(url)
+        self.spec = spec
+        self.recorder = recorder
+        self.stop = stop
+        self.rng = random.Random(seed)
+        self.think_mean = think
+        self.view = {}
+
+    def think(self, scale=1.0):
+        if self.think_mean > 0:
+            self.stop.wait(self.rng.expovariate(1.0 / (self.think_mean * scale)))
+
+    def send(self, label, method, path, body=None):
+        start = time.perf_counter()
+        try:
+            status, _ = self.client.request(method, path, body)
+        except (OSError, http.client.HTTPException):
+            status = None
+        self.recorder.record(label, start, time.perf_counter() - start, status)
+
+    def callback(self, label, outputs, inputs, state=()):
+        if output_key(outputs) in self.spec.server_outputs:
+            self.send(label, "POST", "/_dash-update-component", update_body(outputs, inputs, state))
+
+    # What the browser sends when each control changes
+    def density(self):
+        self.callback("density_map", [("density_map", "figure")],
+                      [("density_metric", "value", self.view["metric"]),
+                       ("density_years", "value", list(self.view["years"]))])
+
+    def comparison(self, kind, changed=1):
+        pair = (f"{kind}_state_1", "value", self.view[kind][0]), (f"{kind}_state_2", "value", self.view[kind][1])
+        self.callback(f"{kind}_chart", [(f"{kind}_comparison_chart", "figure")], pair if changed == 1 else pair[::-1])
+        if changed == 1:
+            self.callback(f"{kind}_similar_states", [(f"{kind}_similar_states", "children")],
+                          [pair[0], (f"{kind}_similarity_method", "value", "jensen_shannon")])
+
+    def multi(self, kind):
+        self.callback(f"{kind}_multi_chart", [(f"{kind}_multi_chart", "figure")],
+                      [(f"{kind}_states_multi", "value", self.view[f"{kind}_multi"])])
+
+    def show_tab(self, tab):
+        self.callback("render_content", [("tabs-content", "children")], [("tabs", "value", tab)])
+        # The new tab's graphs then request their figures for the current control values
+        if tab == "tab1":
+            self.density()
+        else:
+            kind = COMPARISON_KINDS[TABS.index(tab) - 1]
+            self.comparison(kind)
+            self.multi(kind)
+        self.view["tab"] = tab
+
+    def page_load(self):
+        years = self.spec.years
+        self.view = {"metric": "national_share", "years": [years[0], years[-1]]}
+        for kind in COMPARISON_KINDS:
+            defaults = self.spec.defaults[kind]
+            self.view[kind] = [defaults["state1"], defaults["state2"]]
+            self.view[f"{kind}_multi"] = list(defaults["multi"])
+        for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+            self.send(path, "GET", path)
+        self.show_tab("tab1")
+
+    def tab_switch(self):
+        self.show_tab(self.rng.choice([tab for tab in TABS if tab != self.view["tab"]]))
+
+    def slider_drag(self):
+        if self.view["tab"] != "tab1":
+            self.show_tab("tab1")
+        years = self.spec.years
+        if self.rng.random() < 0.2:
+            self.view["metric"] = self.rng.choice(METRICS)
+            self.density()
+        # One handle moves a year at a time (never past the other one); each step is a request
+        handle = self.rng.randrange(2)
+        low, high = self.view["years"]
+        target = self.rng.choice([y for y in years if (y <= high if handle == 0 else y >= low)])
+        while self.view["years"][handle] != target and not self.stop.is_set():
+            self.view["years"][handle] += 1 if target > self.view["years"][handle] else -1
+            self.density()
+            self.think(0.1)
+
+    def dropdown_churn(self):
+        kind = self.rng.choice(COMPARISON_KINDS)
+        tab = TABS[COMPARISON_KINDS.index(kind) + 1]
+        if self.view["tab"] != tab:
+            self.show_tab(tab)
+        for _ in range(self.rng.randint(2, 6)):
+            changed = self.rng.randint(1, 2)
+            self.view[kind][changed - 1] = self.rng.choice(self.spec.states[kind])
+            self.comparison(kind, changed)
+            self.think(0.3)
+
+    def multi_select(self):
+        kind = self.rng.choice(COMPARISON_KINDS)
+        tab = TABS[COMPARISON_KINDS.index(kind) + 1]
+        if self.view["tab"] != tab:
+            self.show_tab(tab)
+        for _ in range(self.rng.randint(1, 4)):
+            selection = self.view[f"{kind}_multi"]
+            if len(selection) > 1 and self.rng.random() < 0.3:
+                selection.remove(self.rng.choice(selection))
+            else:
+                selection.append(self.rng.choice([s for s in self.spec.states[kind] if s not in selection]
+                                                 or self.spec.states[kind]))
+            self.multi(kind)
+            self.think(0.3)
+
+    def run(self):
+        actions, weights = list(ACTIONS), list(ACTIONS.values())
+        try:
+            while not self.stop.is_set():
+                self.page_load()
+                # A session lasts a handful of interactions, then the user reloads
+                for _ in range(self.rng.randint(5, 20)):
+                    if self.stop.is_set():
+                        break
+                    self.think()
+                    getattr(self, self.rng.choices(actions, weights)[0])()
+        finally:
+            self.client.close()
+
+
+class Recorder:
+    """Collects (label, latency, status) for requests started inside the measured window."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []
+        self.window = (float("inf"), float("inf"))
+
+    def record(self, label, start, latency, status):
+        if self.window[0] <= start < self.window[1]:
+            with self.lock:
+                self.samples.append((label, latency, status))
+
+
+def summarize(samples, seconds):
+    def stats(latencies, errors):
+        ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": len(latencies) / seconds if seconds else 0.0,
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p90_ms": float(np.percentile(ms, 90)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "max_ms": float(ms.max()),
+        }
+
+    by_label = {}
+    for label, latency, status in samples:
+        by_label.setdefault(label, []).append((latency, status))
+    overall = stats([latency for _, latency, _ in samples], sum(status != 200 for _, _, status in samples))
+    overall["by_request"] = {label: stats([latency for latency, _ in rows], sum(s != 200 for _, s in rows))
+                             for label, rows in sorted(by_label.items())}
+    return overall
+
+
+def run_load(url, users, duration, warmup, think, seed=0, ramp_up=None):
+    """Drive ``users`` simulated users against ``url``; returns the summary of the measured window."""
+    spec = SessionSpec.discover(Client(url))
+    recorder, stop = Recorder(), threading.Event()
+    ramp_up = min(warmup, 2.0) if ramp_up is None else ramp_up
+    threads = [User(url, spec, recorder, stop, seed * 100003 + i, think) for i in range(users)]
+    begin = time.perf_counter()
+    recorder.window = (begin + warmup, begin + warmup + duration)
+    for user in threads:
+        user.start()
+        # Staggered arrivals, so the first page loads don't all line up
+        time.sleep(ramp_up / users)
+    time.sleep(max(recorder.window[1] - time.perf_counter(), 0.0))
+    stop.set()
+    for user in threads:
+        user.join(timeout=60)
+    return summarize(recorder.samples, duration)
+
+
+# =========================
+# gunicorn lifecycle
+# =========================
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url, process, timeout):
+    client, deadline = Client(url, timeout=5.0), time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            if client.request("GET", "/_dash-layout")[0] == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"gunicorn not ready after {timeout:.0f}s")
+
+
+def launch(workers, threads, worker_class, log, cache_dir, boot_timeout=120.0):
+    """Start gunicorn with gunicorn.conf.py on a free port; returns (process, url)."""
+    port = free_port()
+    env = dict(os.environ, DASHBOARD_CACHE_DIR=cache_dir, DASHBOARD_RELOAD_INTERVAL="0")
+    command = [sys.executable, "-m", "gunicorn", "-c", os.path.join(HERE, "gunicorn.conf.py"),
+               "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+               "--worker-class", worker_class, "NewDashboardFile:server"]
+    process = subprocess.Popen(command, cwd=HERE, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(url, process, boot_timeout)
+    except Exception:
+        stop_server(process)
+        raise
+    return process, url
+
+
+def stop_server(process, timeout=30.0):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def configurations(workers, threads, worker_classes, users):
+    """The matrix, minus duplicates and worker classes that aren't installed."""
+    configs, skipped = [], set()
+    for worker_class, w, t, n in itertools.product(worker_classes, workers, threads, users):
+        module = {"gevent": "gevent", "eventlet": "eventlet"}.get(worker_class)
+        if module and importlib.util.find_spec(module) is None:
+            skipped.add(worker_class)
+            continue
+        # gunicorn turns sync workers with threads into gthread; async workers ignore threads
+        if worker_class != "gthread" and t != 1:
+            continue
+        configs.append({"worker_class": worker_class, "workers": w, "threads": t, "users": n})
+    for worker_class in sorted(skipped):
+        print(f"skipping worker class {worker_class}: not installed", file=sys.stderr)
+    return configs
+
+
+def _print_result(config, result):
+    label = (f"{config.get('worker_class', 'external'):8s} w={config.get('workers', '-')!s:>2} "
+             f"t={config.get('threads', '-')!s:>2} users={config['users']:3d}")
+    print(f"{label}  {result['throughput_rps']:7.1f} req/s  p50={result['p50_ms']:7.1f}ms  "
+          f"p95={result['p95_ms']:7.1f}ms  p99={result['p99_ms']:7.1f}ms  errors={result['errors']}",
+          file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=_csv(int), default=[1, 2], help="comma-separated worker counts")
+    parser.add_argument("--threads", type=_csv(int), default=[1, 4], help="comma-separated threads per worker")
+    parser.add_argument("--worker-class", type=_csv(str), default=["sync", "gthread"],
+                        help="comma-separated gunicorn worker classes")
+    parser.add_argument("--users", type=_csv(int), default=[16], help="comma-separated concurrent user counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per configuration")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before that")
+    parser.add_argument("--think", type=float, default=0.5, help="mean think time between actions (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="load an already-running server instead of launching gunicorn")
+    parser.add_argument("--boot-timeout", type=float, default=120.0)
+    parser.add_argument("--log", default=os.devnull, help="gunicorn output goes here")
+    parser.add_argument("--output", help="write JSON results here")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        configs = [{"users": n} for n in args.users]
+    else:
+        configs = configurations(args.workers, args.threads, args.worker_class, args.users)
+
+    runs = []
+    with open(args.log, "ab") as log:
+        for config in configs:
+            if args.url:
+                result = run_load(args.url, config["users"], args.duration, args.warmup, args.think, args.seed)
+            else:
+                cache_dir = tempfile.mkdtemp(prefix="ai_job_dashboard_loadtest_")
+                try:
+                    process, url = launch(config["workers"], config["threads"], config["worker_class"],
+                                          log, cache_dir, args.boot_timeout)
+                    try:
+                        result = run_load(url, config["users"], args.duration, args.warmup, args.think, args.seed)
+                    finally:
+                        stop_server(process)
+                finally:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+            runs.append(dict(config, **result))
+            _print_result(config, result)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "url": args.url,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "think": args.think,
+            "seed": args.seed,
+        },
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps(report, indent=2) + "\n")
+    return 1 if any(run["errors"] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
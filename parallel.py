@@ -0,0 +1,33 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# =========================
+# Bounded process-pool map
+# =========================
+# Shared by the offline jobs (ingest.py, static_export.py). Tasks are pulled
+# from an iterator only as results come back, so a lazily produced input
+# (chunks of a large CSV, batches of figures) never piles up in the parent.
+
+
+def imap_bounded(func, tasks, workers=1, in_flight_per_worker=2):
+    """Yield ``func(*args)`` for each ``args`` in ``tasks``, in completion order.
+
+    With ``workers`` <= 1 everything runs in this process, in order. Otherwise at
+    most ``in_flight_per_worker * workers`` tasks are submitted at a time.
+    """
+    if workers <= 1:
+        for args in tasks:
+            yield func(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for args in tasks:
+            pending.add(pool.submit(func, *args))
+            if len(pending) >= in_flight_per_worker * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
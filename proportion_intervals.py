@@ -0,0 +1,192 @@
+"""Precompute confidence intervals for every state × category proportion.
+
+The comparison charts draw error bars from bounds stored with the data, so no
+interval is computed per request. Wilson score bounds are vectorized over the
+whole state × category table and are what a snapshot falls back to when no
+stored intervals match its data. The bootstrap path resamples every cell's
+listings (binomial draws at the observed proportion) and takes percentile
+bounds; blocks of cells, sized so each task's draws stay around
+BOOTSTRAP_TASK_BYTES, are resampled in a process pool.
+
+    python proportion_intervals.py --method bootstrap --resamples 10000 --workers 8
+
+Run it after refreshing the CSVs (and after ``python data_bundle.py``, whose
+directory it writes into). Output goes to DASHBOARD_INTERVALS_DIR (default
+``<bundle>/intervals``), the directory snapshots read. Intervals are used only
+while the source CSV they were computed from is unchanged.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data_bundle import BUNDLE_DIR, TABLES, read_manifest, source_fingerprint, write_manifest
+from proportion_stats import wilson_interval
+
+INTERVALS_FORMAT = 1
+INTERVALS_DIR = os.environ.get("DASHBOARD_INTERVALS_DIR", os.path.join(BUNDLE_DIR, "intervals"))
+MANIFEST = os.path.join(INTERVALS_DIR, "manifest.json")
+CONFIDENCE = 0.95
+METHODS = ("wilson", "bootstrap")
+KINDS = {"career": "career_index", "skills": "skills_index"}
+# Rough size of one bootstrap task's draw array (resamples × cells, float64)
+BOOTSTRAP_TASK_BYTES = 64 << 20
+
+
+def _bootstrap_chunk(counts, nobs, confidence, n_resamples, seed):
+    """Percentile bounds for one block of cells from ``n_resamples`` binomial draws each."""
+    valid = np.isfinite(counts) & np.isfinite(nobs) & (nobs > 0)
+    n = np.where(valid, nobs, 0).astype(np.int64)
+    p = np.where(valid, np.clip(np.where(valid, counts, 0) / np.maximum(n, 1), 0.0, 1.0), 0.0)
+    rng = np.random.default_rng(seed)
+    draws = rng.binomial(n, p, size=(n_resamples,) + n.shape) / np.maximum(n, 1)
+    alpha = (1.0 - confidence) / 2.0
+    lower, upper = np.quantile(draws, [alpha, 1.0 - alpha], axis=0)
+    return np.where(valid, lower, np.nan), np.where(valid, upper, np.nan)
+
+
+def bootstrap_interval(counts, nobs, confidence=CONFIDENCE, n_resamples=2000, seed=0, workers=1,
+                       chunk_cells=None):
+    """(lower, upper) percentile bootstrap bounds for a dense rows × categories table.
+
+    Cells are resampled in blocks of ``chunk_cells`` (default: as many as fit in
+    BOOTSTRAP_TASK_BYTES of draws), each with its own child seed, so results
+    depend on ``seed``, ``n_resamples`` and the block size but not on ``workers``.
+    A resampled 0% or 100% never varies, so those cells keep their Wilson bounds.
+    """
+    counts = np.asarray(counts, dtype=float)
+    nobs = np.asarray(nobs, dtype=float)
+    if chunk_cells is None:
+        chunk_cells = max(BOOTSTRAP_TASK_BYTES // (8 * max(n_resamples, 1)), 1)
+    flat_counts, flat_nobs = counts.ravel(), nobs.ravel()
+    starts = range(0, flat_counts.size, chunk_cells)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    args = [(flat_counts[i:i + chunk_cells], flat_nobs[i:i + chunk_cells], confidence, n_resamples, child)
+            for i, child in zip(starts, seeds)]
+    if workers <= 1 or len(args) <= 1:
+        parts = [_bootstrap_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+            parts = list(pool.map(_bootstrap_chunk, *zip(*args)))
+    shape = counts.shape
+    lower = np.concatenate([part[0] for part in parts]).reshape(shape) if parts else np.empty(shape)
+    upper = np.concatenate([part[1] for part in parts]).reshape(shape) if parts else np.empty(shape)
+
+    wilson_lower, wilson_upper = wilson_interval(counts, nobs, confidence)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        degenerate = (counts <= 0) | (counts >= nobs)
+    return np.where(degenerate, wilson_lower, lower), np.where(degenerate, wilson_upper, upper)
+
+
+class ProportionIntervals:
+    """Lower and upper bounds aligned with a StateCategoryIndex's dense state × category arrays."""
+
+    def __init__(self, states, categories, lower, upper, method, confidence):
+        self.states = np.asarray(states, dtype=object)
+        self.categories = np.asarray(categories, dtype=object)
+        self.lower = lower
+        self.upper = upper
+        self.method = method
+        self.confidence = confidence
+
+    @classmethod
+    def compute(cls, index, method="wilson", confidence=CONFIDENCE, **bootstrap_options):
+        if method == "wilson":
+            lower, upper = wilson_interval(index.counts, index.nobs, confidence)
+        elif method == "bootstrap":
+            lower, upper = bootstrap_interval(index.counts, index.nobs, confidence, **bootstrap_options)
+        else:
+            raise ValueError(f"unknown interval method {method!r}")
+        return cls(index.states, index.categories, lower, upper, method, confidence)
+
+    @classmethod
+    def for_index(cls, index, kind, intervals_dir=None):
+        """The stored intervals for ``kind`` if they were computed from this data, else Wilson bounds."""
+        return cls.load(index, kind, intervals_dir) or cls.compute(index)
+
+    def errors(self, state_id, category_ids, values):
+        """(plus, minus) error-bar lengths around ``values`` for one state's categories."""
+        category_ids = np.asarray(category_ids, dtype=np.intp)
+        values = np.asarray(values, dtype=float)
+        if state_id < 0 or len(category_ids) == 0:
+            return [], []
+        with np.errstate(invalid="ignore"):
+            plus = np.maximum(self.upper[state_id, category_ids] - values, 0.0)
+            minus = np.maximum(values - self.lower[state_id, category_ids], 0.0)
+        return plus.tolist(), minus.tolist()
+
+    # Storage next to the data bundle
+    def save(self, kind, intervals_dir=None, **details):
+        intervals_dir = intervals_dir or INTERVALS_DIR
+        os.makedirs(os.path.join(intervals_dir, kind), exist_ok=True)
+        np.save(os.path.join(intervals_dir, kind, "lower.npy"), self.lower)
+        np.save(os.path.join(intervals_dir, kind, "upper.npy"), self.upper)
+        return {"source": TABLES[kind]["source"], "fingerprint": source_fingerprint(TABLES[kind]["source"]),
+                "method": self.method, "confidence": self.confidence,
+                "states": self.states.tolist(), "categories": self.categories.tolist(), **details}
+
+    @classmethod
+    def load(cls, index, kind, intervals_dir=None):
+        """Stored intervals for ``kind``, or None if missing or computed from different data."""
+        intervals_dir = intervals_dir or INTERVALS_DIR
+        entry = (read_manifest(intervals_dir, INTERVALS_FORMAT) or {}).get("kinds", {}).get(kind)
+        try:
+            if (not entry or entry["fingerprint"] != source_fingerprint(TABLES[kind]["source"])
+                    or entry["states"] != index.states.tolist()
+                    or entry["categories"] != index.categories.tolist()):
+                return None
+            lower = np.load(os.path.join(intervals_dir, kind, "lower.npy"), mmap_mode="r")
+            upper = np.load(os.path.join(intervals_dir, kind, "upper.npy"), mmap_mode="r")
+        except OSError:
+            return None
+        return cls(index.states, index.categories, lower, upper, entry["method"], entry["confidence"])
+
+    def export(self):
+        """(arrays, metadata) for publishing the bounds in shared memory."""
+        meta = {"states": self.states.tolist(), "categories": self.categories.tolist(),
+                "method": self.method, "confidence": self.confidence}
+        return {"lower": self.lower, "upper": self.upper}, meta
+
+    @classmethod
+    def restore(cls, arrays, meta):
+        return cls(meta["states"], meta["categories"], arrays["lower"], arrays["upper"],
+                   meta["method"], meta["confidence"])
+
+
+def build_intervals(snapshot, intervals_dir=None, method="wilson", confidence=CONFIDENCE, **bootstrap_options):
+    intervals_dir = intervals_dir or INTERVALS_DIR
+    manifest = {"format": INTERVALS_FORMAT, "kinds": {}}
+    details = {key: value for key, value in bootstrap_options.items() if key != "workers"}
+    for kind, attr in KINDS.items():
+        intervals = ProportionIntervals.compute(getattr(snapshot, attr), method, confidence, **bootstrap_options)
+        manifest["kinds"][kind] = intervals.save(kind, intervals_dir, **(details if method == "bootstrap" else {}))
+    write_manifest(intervals_dir, manifest)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--method", choices=METHODS, default="wilson")
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--resamples", type=int, default=2000, help="bootstrap resamples per cell")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    from data_snapshot import DataSnapshot
+    options = {}
+    if args.method == "bootstrap":
+        options = {"n_resamples": args.resamples, "seed": args.seed, "workers": args.workers}
+    start = time.perf_counter()
+    manifest = build_intervals(DataSnapshot.load(), INTERVALS_DIR, args.method, args.confidence, **options)
+    for kind, entry in manifest["kinds"].items():
+        print(f"{kind}: {len(entry['states'])} states × {len(entry['categories'])} categories, "
+              f"{entry['method']} {entry['confidence']:.0%}", file=sys.stderr)
+    print(f"done in {time.perf_counter() - start:.1f}s -> {INTERVALS_DIR}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
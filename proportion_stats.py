@@ -0,0 +1,190 @@
+import numpy as np
+
+# =========================
+# Vectorized two-proportion z-tests
+# =========================
+# Same statistic as statsmodels' proportions_ztest(count, nobs) with its defaults
+# (pooled variance, two-sided), but for whole arrays at once.
+
+
+def erfc(x):
+    """Complementary error function, elementwise (fractional error < 1.2e-7)."""
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 +
+           t * (-0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 +
+           t * (-0.82215223 + t * 0.17087277))))))))
+    ans = t * np.exp(poly)
+    return np.where(x >= 0, ans, 2.0 - ans)
+
+
+def two_sided_pvalue(z):
+    return np.minimum(erfc(np.abs(z) / np.sqrt(2.0)), 1.0)
+
+
+def two_proportion_ztest(count1, nobs1, count2, nobs2):
+    """z-statistics and two-sided p-values for arrays of proportion pairs.
+
+    Inputs broadcast against each other. Pairs with a missing count, an empty
+    sample or zero pooled variance get NaN for both outputs.
+    """
+    count1, nobs1 = np.asarray(count1, dtype=float), np.asarray(nobs1, dtype=float)
+    count2, nobs2 = np.asarray(count2, dtype=float), np.asarray(nobs2, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled = (count1 + count2) / (nobs1 + nobs2)
+        var = pooled * (1.0 - pooled) * (1.0 / nobs1 + 1.0 / nobs2)
+        z = (count1 / nobs1 - count2 / nobs2) / np.sqrt(var)
+    z = np.where(np.isfinite(z), z, np.nan)
+    return z, two_sided_pvalue(z)
+
+
+def pairwise_pvalues(counts, nobs):
+    """State × state × category p-value tensor from dense state × category arrays.
+
+    A state against itself is not a test: the diagonal is NaN (shown as "n/a").
+    """
+    counts = np.asarray(counts, dtype=float)
+    nobs = np.asarray(nobs, dtype=float)
+    _, p = two_proportion_ztest(counts[:, None, :], nobs[:, None, :],
+                                counts[None, :, :], nobs[None, :, :])
+    same = np.arange(len(counts))
+    p[same, same, :] = np.nan
+    return p
+
+
+# =========================
+# k-sample chi-square test of equal proportions
+# =========================
+# Same statistic as statsmodels' proportions_chisquare(count, nobs): the 2 × k
+# contingency table of successes and failures, tested for homogeneity. The
+# inputs are state × category arrays; every category is tested in one pass.
+
+
+def _log_factorials(n):
+    """log(i!) for i in 0..n."""
+    return np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, n + 1, dtype=float)))])
+
+
+def chi2_sf(x, df):
+    """Chi-square survival function for integer degrees of freedom, elementwise.
+
+    Uses the closed forms for even and odd ``df`` (a Poisson tail, and erfc plus
+    a finite series), summed in log space so large statistics underflow to 0
+    cleanly. ``df`` < 1 or a non-finite ``x`` gives NaN.
+    """
+    x, df = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(df))
+    valid = np.isfinite(x) & (df >= 1)
+    x = np.where(valid, np.maximum(x, 0.0), 0.0)
+    df = np.where(valid, df, 1).astype(np.int64)
+    n_terms = int(df.max(initial=1)) // 2
+    r = np.arange(n_terms + 1).reshape((-1,) + (1,) * x.ndim)
+    half = x / 2.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_half = np.log(half)
+        # Even df: exp(-x/2) * sum_{r < df/2} (x/2)^r / r!
+        log_even = r * log_half - _log_factorials(n_terms)[r] - half
+        log_even = np.where(r == 0, -half, log_even)
+        even = np.where(r < df // 2, np.exp(log_even), 0.0).sum(axis=0)
+        # Odd df: erfc(sqrt(x/2)) + exp(-x/2) * sum_{1 <= r <= (df-1)/2} (x/2)^(r-1/2) / Gamma(r+1/2)
+        log_gamma_half = 0.5 * np.log(np.pi) + np.concatenate(
+            [[0.0], np.cumsum(np.log(np.arange(n_terms) + 0.5))])
+        log_odd = (r - 0.5) * log_half - log_gamma_half[r] - half
+        odd = np.where((r >= 1) & (r <= (df - 1) // 2), np.exp(log_odd), 0.0).sum(axis=0)
+    sf = np.where(df % 2 == 0, even, erfc(np.sqrt(half)) + np.where(x > 0, odd, 0.0))
+    return np.where(valid, np.clip(sf, 0.0, 1.0), np.nan)
+
+
+def k_sample_chi2(counts, nobs):
+    """(statistic, degrees of freedom, p-value) per category for a states × categories table.
+
+    NaN cells (a state without that category) are left out of that category's
+    test, so ``df`` is the number of states with data minus one. Categories with
+    fewer than two such states or zero pooled variance get NaN.
+    """
+    counts = np.asarray(counts, dtype=float)
+    nobs = np.asarray(nobs, dtype=float)
+    valid = np.isfinite(counts) & np.isfinite(nobs) & (nobs > 0)
+    counts = np.where(valid, counts, 0.0)
+    nobs = np.where(valid, nobs, 0.0)
+    k = valid.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled = counts.sum(axis=0) / nobs.sum(axis=0)
+        expected = nobs * pooled
+        # Successes and failures: (c - n·p)² / (n·p) + (c - n·p)² / (n·(1 - p))
+        terms = (counts - expected) ** 2 / (expected * (1.0 - pooled))
+        stat = np.where(valid, terms, 0.0).sum(axis=0)
+    stat = np.where(np.isfinite(stat) & (k >= 2), stat, np.nan)
+    dof = np.maximum(k - 1, 0)
+    return stat, dof, chi2_sf(stat, dof)
+
+
+# =========================
+# Confidence intervals for proportions
+# =========================
+# Wilson score intervals, which unlike the normal approximation stay inside
+# [0, 1] and keep a sensible width for single-digit counts.
+
+
+def normal_quantile(confidence):
+    """Two-sided critical value z with P(|Z| <= z) = ``confidence`` (bisection on erfc)."""
+    lo, hi = 0.0, 40.0
+    for _ in range(60):
+        mid = (lo + hi) / 2.0
+        if two_sided_pvalue(mid) > 1.0 - confidence:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2.0
+
+
+def wilson_interval(count, nobs, confidence=0.95):
+    """(lower, upper) Wilson score bounds for arrays of proportions count / nobs.
+
+    A missing count or an empty sample gives NaN for both bounds.
+    """
+    count, nobs = np.asarray(count, dtype=float), np.asarray(nobs, dtype=float)
+    z = normal_quantile(confidence)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = count / nobs
+        denom = 1.0 + z * z / nobs
+        center = (p + z * z / (2.0 * nobs)) / denom
+        half = z * np.sqrt(p * (1.0 - p) / nobs + z * z / (4.0 * nobs * nobs)) / denom
+    valid = np.isfinite(p) & (nobs > 0)
+    lower = np.where(valid, np.clip(center - half, 0.0, 1.0), np.nan)
+    upper = np.where(valid, np.clip(center + half, 0.0, 1.0), np.nan)
+    return lower, upper
+
+
+class PairwisePValues:
+    """All-pairs p-values for one comparison dataset, precomputed at load.
+
+    The tensor is indexed by a StateCategoryIndex's state and category ids;
+    categories missing for a state produce NaN p-values.
+    """
+
+    def __init__(self, states, categories, pvalues):
+        self.states = np.asarray(states, dtype=object)
+        self.categories = np.asarray(categories, dtype=object)
+        self.pvalues = pvalues
+
+    @classmethod
+    def from_index(cls, index):
+        """Tensor over a StateCategoryIndex's dense count and total arrays."""
+        return cls(index.states, index.categories, pairwise_pvalues(index.counts, index.nobs))
+
+    def lookup_ids(self, i, j, category_ids):
+        """p-values by integer position (-1 for unknown gives NaN)."""
+        category_ids = np.asarray(category_ids, dtype=np.intp)
+        if i < 0 or j < 0:
+            return np.full(len(category_ids), np.nan)
+        out = self.pvalues[i, j, np.where(category_ids < 0, 0, category_ids)]
+        return np.where(category_ids < 0, np.nan, out)
+
+    def export(self):
+        """(arrays, metadata) for publishing the tensor in shared memory."""
+        return {"pvalues": self.pvalues}, {"states": self.states.tolist(), "categories": self.categories.tolist()}
+
+    @classmethod
+    def restore(cls, arrays, meta):
+        return cls(meta["states"], meta["categories"], arrays["pvalues"])
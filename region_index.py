@@ -0,0 +1,170 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from density_cube import metric_values, prefix_sums, range_totals, year_bounds
+
+# =========================
+# State → metro → county drill-down index
+# =========================
+# Optional: only active when the region table (and a GeoJSON per level) is
+# present. The table has one row per county and year:
+#
+#   state_name, metro_code, metro_name, county_fips, county_name, year,
+#   ai_jobs_count, all_jobs_count
+#
+# (``metro_code`` is empty for counties outside a metro area.) Counts are
+# summed into per-level region × year arrays once at load and stored as
+# prefix sums with DensityYearCube's helpers, so a slider move is one subtraction over
+# the regions of the selected state. Regions within each state are kept in a
+# CSR layout; a metro spanning several states is listed under each of them.
+
+REGION_DATA = os.environ.get("DASHBOARD_REGION_DATA", "RegionDensityData.csv")
+# One GeoJSON per level, features matched on ``id`` (served to the browser as-is)
+GEOJSON = {
+    "metro": os.environ.get("DASHBOARD_METRO_GEOJSON", "metros.geojson"),
+    "county": os.environ.get("DASHBOARD_COUNTY_GEOJSON", "counties.geojson"),
+}
+LEVELS = ("state", "metro", "county")
+LEVEL_LABELS = {"metro": "Metro areas", "county": "Counties"}
+
+
+def load_region_data(path=None):
+    """The region table, or None when the drill-down data is not installed."""
+    path = path or REGION_DATA
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={"metro_code": str, "county_fips": str})
+
+
+def available_levels(index):
+    """Drill-down levels that have both data and shapes."""
+    if index is None:
+        return []
+    return [level for level in ("metro", "county") if len(index.keys[level]) and os.path.exists(GEOJSON[level])]
+
+
+def _by_state(region_state_pairs, n_states):
+    """CSR (offsets, members) listing each state's regions from (state, region) pairs."""
+    pairs = np.unique(region_state_pairs, axis=0) if len(region_state_pairs) else np.empty((0, 2), dtype=np.int64)
+    offsets = np.searchsorted(pairs[:, 0], np.arange(n_states + 1)).astype(np.int64)
+    return offsets, pairs[:, 1].astype(np.int64)
+
+
+class RegionYearIndex:
+    def __init__(self, df):
+        df = df.dropna(subset=["year", "county_fips", "state_name"])
+        years = df["year"].astype(int)
+        self.min_year = int(years.min()) if len(years) else 0
+        self.max_year = int(years.max()) if len(years) else 0
+        n_years = self.max_year - self.min_year + 1 if len(years) else 0
+        year_pos = years.to_numpy() - self.min_year
+
+        state_pos, states = pd.factorize(df["state_name"], sort=True)
+        county_pos, counties = pd.factorize(df["county_fips"], sort=True)
+        metro_pos, metros = pd.factorize(df["metro_code"], sort=True)
+
+        # County-level yearly sums; metros and states are sums of their counties
+        yearly = {}
+        for name, col in (("ai", "ai_jobs_count"), ("all", "all_jobs_count"), ("rows", None)):
+            values = np.ones(len(df), dtype=np.int64) if col is None else df[col].fillna(0).to_numpy(dtype=np.int64)
+            county = np.zeros((len(counties), n_years), dtype=np.int64)
+            np.add.at(county, (county_pos, year_pos), values)
+            yearly[name] = {"county": county}
+            for level, pos, n in (("metro", metro_pos, len(metros)), ("state", state_pos, len(states))):
+                out = np.zeros((n, n_years), dtype=np.int64)
+                keep = pos >= 0
+                np.add.at(out, (pos[keep], year_pos[keep]), values[keep])
+                yearly[name][level] = out
+
+        self.keys = {"state": np.asarray(states, dtype=object),
+                     "metro": np.asarray(metros, dtype=object),
+                     "county": np.asarray(counties, dtype=object)}
+        # Display names from each region's first row, in id order
+        county_first = df.assign(_id=county_pos).drop_duplicates("_id").sort_values("_id")
+        metro_first = df.assign(_id=metro_pos)[metro_pos >= 0].drop_duplicates("_id").sort_values("_id")
+        self.names = {"state": self.keys["state"],
+                      "metro": metro_first["metro_name"].to_numpy(dtype=object),
+                      "county": county_first["county_name"].to_numpy(dtype=object)}
+        self.ai_cum = {level: prefix_sums(yearly["ai"][level]) for level in LEVELS}
+        self.all_cum = {level: prefix_sums(yearly["all"][level]) for level in LEVELS}
+        self.rows_cum = {level: prefix_sums(yearly["rows"][level]) for level in LEVELS}
+
+        pairs = {"county": np.column_stack([state_pos, county_pos]),
+                 "metro": np.column_stack([state_pos, metro_pos])[metro_pos >= 0]}
+        self.offsets, self.members = {}, {}
+        for level, level_pairs in pairs.items():
+            self.offsets[level], self.members[level] = _by_state(level_pairs, len(states))
+        self._build_lookups()
+
+    def _build_lookups(self):
+        self._state_ids = {state: i for i, state in enumerate(self.keys["state"])}
+
+    @property
+    def states(self):
+        return self.keys["state"].tolist()
+
+    @property
+    def years(self):
+        return list(range(self.min_year, self.max_year + 1)) if self.ai_cum["state"].shape[1] > 1 else []
+
+    def range_sums(self, level, start_year, end_year, state=None):
+        """Per-region AI and all-job sums over [start_year, end_year] and the U.S. AI total.
+
+        With ``state``, only that state's regions are returned. Regions without
+        rows in the range are left out.
+        """
+        lo, hi = year_bounds(self.ai_cum["state"], self.min_year, start_year, end_year)
+        state_rows = range_totals(self.rows_cum["state"], lo, hi)
+        us_total = int(range_totals(self.ai_cum["state"], lo, hi)[state_rows > 0].sum())
+
+        if state is None or level == "state":
+            ids = np.arange(len(self.keys[level]))
+            if state is not None:
+                ids = ids[self.keys["state"] == state]
+        else:
+            i = self._state_ids.get(state, -1)
+            ids = (self.members[level][self.offsets[level][i]:self.offsets[level][i + 1]] if i >= 0
+                   else np.empty(0, dtype=np.int64))
+        ai = range_totals(self.ai_cum[level], lo, hi, ids)
+        all_jobs = range_totals(self.all_cum[level], lo, hi, ids)
+        keep = range_totals(self.rows_cum[level], lo, hi, ids) > 0
+        ids = ids[keep]
+        return {"key": self.keys[level][ids], "name": self.names[level][ids],
+                "ai_jobs": ai[keep], "all_jobs": all_jobs[keep]}, us_total
+
+    def metric(self, level, metric, start_year, end_year, state=None):
+        """Range sums plus the selected metric under ``value`` (NaN where undefined)."""
+        sums, us_total = self.range_sums(level, start_year, end_year, state)
+        sums["value"] = metric_values(metric, sums["ai_jobs"], sums["all_jobs"], us_total)
+        return sums, us_total
+
+    def export(self):
+        """(arrays, metadata) for publishing the index in shared memory."""
+        arrays = {}
+        for level in LEVELS:
+            arrays[f"{level}/ai_cum"] = self.ai_cum[level]
+            arrays[f"{level}/all_cum"] = self.all_cum[level]
+            arrays[f"{level}/rows_cum"] = self.rows_cum[level]
+        for level in ("metro", "county"):
+            arrays[f"{level}/offsets"] = self.offsets[level]
+            arrays[f"{level}/members"] = self.members[level]
+        meta = {"min_year": self.min_year, "max_year": self.max_year,
+                "keys": {level: self.keys[level].tolist() for level in LEVELS},
+                "names": {level: [None if pd.isna(n) else n for n in self.names[level]] for level in LEVELS}}
+        return arrays, meta
+
+    @classmethod
+    def restore(cls, arrays, meta):
+        index = cls.__new__(cls)
+        index.min_year, index.max_year = meta["min_year"], meta["max_year"]
+        index.keys = {level: np.array(meta["keys"][level], dtype=object) for level in LEVELS}
+        index.names = {level: np.array(meta["names"][level], dtype=object) for level in LEVELS}
+        index.ai_cum = {level: arrays[f"{level}/ai_cum"] for level in LEVELS}
+        index.all_cum = {level: arrays[f"{level}/all_cum"] for level in LEVELS}
+        index.rows_cum = {level: arrays[f"{level}/rows_cum"] for level in LEVELS}
+        index.offsets = {level: arrays[f"{level}/offsets"] for level in ("metro", "county")}
+        index.members = {level: arrays[f"{level}/members"] for level in ("metro", "county")}
+        index._build_lookups()
+        return index
@@ -0,0 +1,151 @@
+"""Publish a data snapshot in shared memory for gunicorn workers.
+
+The gunicorn master (see gunicorn.conf.py) loads the snapshot once and copies
+every table column and derived index array into a single shared-memory
+segment. A JSON manifest describes where each array lives. Workers started
+with ``DASHBOARD_SHM_MANIFEST`` pointing at that manifest attach to the segment
+and wrap read-only NumPy views around it, so per-worker memory stays flat as
+the data grows.
+
+When the data files change the master publishes a new segment and atomically
+replaces the manifest at the same path; workers watch that file and re-attach
+(see data_snapshot.py). The previous segment is unlinked only at the next
+publish, so a worker that read the old manifest can still attach to it. A
+worker loads privately only if no segment can be attached.
+"""
+import json
+import mmap
+import os
+import tempfile
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from data_bundle import decode_column, encode_column
+from category_index import StateCategoryIndex
+from data_snapshot import DataSnapshot
+from density_cube import DensityYearCube
+from proportion_intervals import ProportionIntervals
+from proportion_stats import PairwisePValues
+from region_index import RegionYearIndex
+from state_similarity import StateSimilarity
+
+ALIGN = 64
+TABLE_ATTRS = ("density_map_data", "top_ai_skills_data", "top_ai_career_data")
+INDEX_TYPES = {"density_cube": DensityYearCube,
+               "career_index": StateCategoryIndex, "skills_index": StateCategoryIndex,
+               "career_pvalues": PairwisePValues, "skills_pvalues": PairwisePValues,
+               "career_intervals": ProportionIntervals, "skills_intervals": ProportionIntervals,
+               "career_similarity": StateSimilarity, "skills_similarity": StateSimilarity,
+               "region_index": RegionYearIndex}
+
+
+def _collect(snapshot):
+    """({array key: ndarray}, metadata) for everything in the snapshot."""
+    arrays, meta = {}, {"version": snapshot.version, "tables": {}, "indexes": {}}
+    for attr in TABLE_ATTRS:
+        columns = []
+        for col, series in getattr(snapshot, attr).items():
+            categorical = not pd.api.types.is_numeric_dtype(series.dtype)
+            values, spec = encode_column(series, categorical)
+            arrays[f"{attr}/{col}"] = values
+            columns.append(dict(spec, name=col))
+        meta["tables"][attr] = columns
+    for attr in INDEX_TYPES:
+        if getattr(snapshot, attr) is None:  # optional indexes (drill-down regions)
+            continue
+        index_arrays, index_meta = getattr(snapshot, attr).export()
+        for key, values in index_arrays.items():
+            arrays[f"{attr}/{key}"] = np.ascontiguousarray(values)
+        meta["indexes"][attr] = {"arrays": list(index_arrays), "meta": index_meta}
+    return arrays, meta
+
+
+class SharedSnapshot:
+    """Owner side of a published snapshot; ``unlink()`` when it is replaced or the master exits."""
+
+    def __init__(self, snapshot, manifest_path=None):
+        arrays, meta = _collect(snapshot)
+        layout, offset = {}, 0
+        for key, values in arrays.items():
+            offset = -(-offset // ALIGN) * ALIGN
+            layout[key] = {"offset": offset, "dtype": values.dtype.str, "shape": list(values.shape)}
+            offset += values.nbytes
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for key, values in arrays.items():
+            spec = layout[key]
+            view = np.ndarray(values.shape, dtype=values.dtype, buffer=self.shm.buf, offset=spec["offset"])
+            view[...] = values
+
+        meta.update(segment=self.shm.name, size=offset, arrays=layout)
+        if manifest_path is None:
+            fd, manifest_path = tempfile.mkstemp(prefix="ai_job_dashboard_shm_", suffix=".json")
+            os.close(fd)
+        # Write-then-rename: workers re-reading the manifest never see a partial file
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, manifest_path)
+        self.manifest_path = manifest_path
+        self.version = snapshot.version
+
+    def unlink(self, remove_manifest=True):
+        """Release the segment; keep the manifest when a newer segment has been published to it."""
+        self.shm.close()
+        self.shm.unlink()
+        if remove_manifest:
+            try:
+                os.remove(self.manifest_path)
+            except OSError:
+                pass
+
+
+def _open_segment(name):
+    """(owner, buffer) for an existing segment, without taking over its cleanup."""
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+        return shm, shm.buf
+    except TypeError:
+        pass
+    # Before Python 3.13 attaching always registers the segment with the resource
+    # tracker, which unlinks it when the process exits; map the POSIX object directly
+    fd = os.open(os.path.join("/dev/shm", name), os.O_RDONLY)
+    try:
+        mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    return mapping, mapping
+
+
+def attach(manifest_path):
+    """A DataSnapshot backed by the published segment, or None if it is missing."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        owner, buf = _open_segment(meta["segment"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+    def view(key):
+        spec = meta["arrays"][key]
+        arr = np.ndarray(tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]), buffer=buf, offset=spec["offset"])
+        arr.flags.writeable = False
+        return arr
+
+    tables = []
+    for attr in TABLE_ATTRS:
+        columns = {spec["name"]: decode_column(view(f"{attr}/{spec['name']}"), spec)
+                   for spec in meta["tables"][attr]}
+        tables.append(pd.DataFrame(columns, copy=False))
+    indexes = {}
+    for attr, cls in INDEX_TYPES.items():
+        entry = meta["indexes"].get(attr)
+        if entry is None:
+            continue
+        indexes[attr] = cls.restore({key: view(f"{attr}/{key}") for key in entry["arrays"]}, entry["meta"])
+
+    snapshot = DataSnapshot(meta["version"], *tables, **indexes)
+    snapshot.shared_segment = owner  # keeps the mapping alive as long as the snapshot
+    return snapshot
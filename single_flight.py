@@ -0,0 +1,101 @@
+import contextlib
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; cross-process locking is skipped there
+    fcntl = None
+
+# =========================
+# Request coalescing
+# =========================
+# When a burst of sessions asks for the same figure at once, only one caller
+# computes it. Inside a process, concurrent callers with the same key wait on
+# the first one and share its result (SingleFlight). Across gunicorn workers,
+# an advisory lock file per key serializes the computation; the workers that
+# waited then find the result in the shared disk cache instead of recomputing.
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """``(fn(), shared)``: concurrent calls with the same key run ``fn`` once.
+
+        ``shared`` is True for callers that got another caller's result. An
+        exception is raised in every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+@contextlib.contextmanager
+def file_lock(path, timeout=30.0, poll=0.01):
+    """Hold an exclusive advisory lock on ``path`` (created if missing) across processes.
+
+    Yields True if another process held it first, i.e. its work may now be done.
+    After ``timeout`` seconds of waiting, or where locking is unavailable, the
+    body runs without the lock rather than failing the request.
+    """
+    if fcntl is None:
+        yield False
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        yield False
+        return
+
+    waited, locked = False, False
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+                break
+            except BlockingIOError:
+                waited = True
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(poll)
+        yield waited
+    finally:
+        if locked:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
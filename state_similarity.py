@@ -0,0 +1,96 @@
+import numpy as np
+
+from category_index import OTHER_CATEGORY
+
+# =========================
+# Similar-states search
+# =========================
+# Each state's career or skill proportions form a profile (a row of the dense
+# state × category matrix in StateCategoryIndex). All-pairs similarity is
+# computed at load, and each state's neighbors are pre-sorted, so "top k most
+# similar to X" is a row slice. The "Other" rollup is left out of the profiles:
+# it holds whatever fell outside each state's top N, so it is a different mix
+# in every state.
+
+METHODS = ("jensen_shannon", "cosine")
+METHOD_LABELS = {"jensen_shannon": "Jensen–Shannon", "cosine": "Cosine"}
+
+
+def profiles(index):
+    """State × category proportions without "Other", missing categories as 0, each row summing to 1."""
+    values = np.where(np.isfinite(index.proportions), index.proportions, 0.0)
+    values[:, index.categories == OTHER_CATEGORY] = 0.0
+    totals = values.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals > 0, values / totals, 0.0)
+
+
+def cosine_similarity(matrix):
+    """All-pairs cosine similarity of the rows (0 for an all-zero row)."""
+    norms = np.linalg.norm(matrix, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit = np.where(norms[:, None] > 0, matrix / norms[:, None], 0.0)
+    return np.clip(unit @ unit.T, -1.0, 1.0)
+
+
+def jensen_shannon_similarity(matrix, block=64):
+    """All-pairs 1 - Jensen–Shannon divergence (base 2, so in [0, 1]) of distribution rows.
+
+    Rows are processed ``block`` at a time so the pairs × categories temporaries
+    stay bounded for large category sets.
+    """
+    n = len(matrix)
+    out = np.empty((n, n))
+
+    def plogp_ratio(p, m):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(p > 0, p * np.log2(p / m), 0.0)
+
+    for start in range(0, n, block):
+        p = matrix[start:start + block, None, :]
+        q = matrix[None, :, :]
+        m = (p + q) / 2.0
+        divergence = 0.5 * plogp_ratio(p, m).sum(axis=2) + 0.5 * plogp_ratio(q, m).sum(axis=2)
+        out[start:start + block] = 1.0 - np.clip(divergence, 0.0, 1.0)
+    return out
+
+
+class StateSimilarity:
+    def __init__(self, index):
+        self.states = np.asarray(index.states, dtype=object)
+        matrix = profiles(index)
+        self.similarity = {
+            "jensen_shannon": jensen_shannon_similarity(matrix),
+            "cosine": cosine_similarity(matrix),
+        }
+        self._rank()
+
+    def _rank(self):
+        self._state_ids = {state: i for i, state in enumerate(self.states)}
+        # Each row's other states, most similar first (ties keep state order)
+        self.order = {}
+        for method, sim in self.similarity.items():
+            masked = sim.copy()
+            np.fill_diagonal(masked, -np.inf)
+            self.order[method] = np.argsort(-masked, axis=1, kind="stable")[:, :max(len(self.states) - 1, 0)]
+
+    def neighbors(self, state, k=5, method="jensen_shannon"):
+        """[(state, similarity)] for the ``k`` states most similar to ``state``."""
+        i = self._state_ids.get(state, -1)
+        if i < 0 or method not in self.order:
+            return []
+        ids = self.order[method][i, :k]
+        return list(zip(self.states[ids].tolist(), self.similarity[method][i, ids].tolist()))
+
+    def export(self):
+        """(arrays, metadata) for publishing the matrices in shared memory."""
+        arrays = {method: sim for method, sim in self.similarity.items()}
+        return arrays, {"states": self.states.tolist()}
+
+    @classmethod
+    def restore(cls, arrays, meta):
+        similarity = cls.__new__(cls)
+        similarity.states = np.asarray(meta["states"], dtype=object)
+        similarity.similarity = {method: arrays[method] for method in METHODS}
+        similarity._rank()
+        return similarity
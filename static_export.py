@@ -0,0 +1,214 @@
+"""Prerender every dashboard figure to static JSON for serving without Python.
+
+The input space is finite: both density metrics over every contiguous year
+range, and every ordered state pair for the career and skills comparisons.
+Each figure is the callback's output applied to its chart template, written
+as Plotly JSON next to a small viewer (index.html) that fetches them, plus the
+plotly.js that matches the plotly.py which wrote them, so the output directory
+works offline on a CDN or file share (browsers will not fetch from file://, so
+use any static HTTP server).
+
+Rebuilds are incremental: every output records a fingerprint of the code and
+of just the data it reads (the years in its range, or its two states' rows),
+so after a data refresh only the affected figures are rendered again.
+
+    python static_export.py --out-dir export --workers 8
+    python -m http.server --directory export
+"""
+import argparse
+import functools
+import hashlib
+import itertools
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+# Deterministic, offline runs: no shared disk cache, no reload thread
+os.environ.setdefault("DASHBOARD_CACHE_DIR", "")
+os.environ.setdefault("DASHBOARD_RELOAD_INTERVAL", "0")
+
+import numpy as np
+import plotly
+from plotly.utils import PlotlyJSONEncoder
+
+import NewDashboardFile as dashboard
+from figure_cache import data_version
+from parallel import imap_bounded
+
+EXPORT_FORMAT = 1
+METRICS = ("state_share", "national_share")
+COMPARISON_KINDS = ("career", "skills")
+VIEWER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static_viewer.html")
+# The plotly.js bundled with the plotly.py that writes the figures; copied next to the viewer
+PLOTLY_JS = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+# Changing any of these can change every figure
+CODE_FILES = dashboard.FIGURE_CODE_FILES + [os.path.abspath(__file__)]
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-")
+
+
+def code_fingerprint():
+    return _digest(data_version(CODE_FILES), plotly.__version__, EXPORT_FORMAT)
+
+
+def year_fingerprints(cube):
+    """{year: digest of every state's rows for that year}."""
+    per_year = [np.diff(cum, axis=1) for cum in (cube.ai_cum, cube.all_cum, cube.rows_cum)]
+    names = cube.state_names.tolist()
+    abbrevs = [a if isinstance(a, str) else None for a in cube.state_abbrevs]
+    return {year: _digest(names, abbrevs, *(values[:, i].tolist() for values in per_year))
+            for i, year in enumerate(cube.years)}
+
+
+def state_fingerprints(index, intervals):
+    """{state: digest of that state's category rows and their interval bounds}."""
+    prints = {}
+    for state_id, state in enumerate(index.states):
+        ids = index.row_ids(state_id)
+        prints[state] = _digest(index.categories[ids].tolist(), index.counts[state_id, ids].tolist(),
+                                index.nobs[state_id, ids].tolist(), index.proportions[state_id, ids].tolist(),
+                                intervals.lower[state_id, ids].tolist(), intervals.upper[state_id, ids].tolist())
+    return prints
+
+
+def plan_outputs(snapshot):
+    """({relative path: (kind, args, fingerprint)}, viewer metadata) for the whole input space."""
+    code = code_fingerprint()
+    outputs = {}
+
+    cube = snapshot.density_cube
+    years = year_fingerprints(cube)
+    for metric in METRICS:
+        for start, end in itertools.combinations_with_replacement(cube.years, 2):
+            fingerprint = _digest(code, metric, start, end, [years[y] for y in range(start, end + 1)])
+            outputs[f"density/{metric}/{start}-{end}.json"] = ("density", (metric, [start, end]), fingerprint)
+
+    meta = {"format": EXPORT_FORMAT, "version": snapshot.version, "years": cube.years,
+            "metrics": list(METRICS), "states": {},
+            "defaults": {"metric": "national_share", "state1": "California", "state2": "Tennessee"}}
+    for kind in COMPARISON_KINDS:
+        spec = dashboard.COMPARISONS[kind]
+        index = getattr(snapshot, spec["index"])
+        prints = state_fingerprints(index, getattr(snapshot, spec["intervals"]))
+        states = index.states.tolist()
+        meta["states"][kind] = {state: slug(state) for state in states}
+        for state1, state2 in itertools.product(states, repeat=2):
+            fingerprint = _digest(code, kind, state1, state2, prints[state1], prints[state2])
+            outputs[f"{kind}/{slug(state1)}__{slug(state2)}.json"] = (kind, (state1, state2), fingerprint)
+    return outputs, meta
+
+
+@functools.lru_cache(maxsize=None)
+def template_json(kind):
+    template = dashboard.density_template() if kind == "density" else dashboard.comparison_template(kind)
+    return template.to_json(validate=False)
+
+
+def apply_patch(figure, patch):
+    """Apply a serialized ``dash.Patch`` (assignments only) to a figure dict in place."""
+    for op in patch["operations"]:
+        if op["operation"] != "Assign":
+            raise ValueError(f"unsupported patch operation {op['operation']!r}")
+        *parents, last = op["location"]
+        target = figure
+        for key in parents:
+            target = target[key] if isinstance(target, list) else target.setdefault(key, {})
+        target[last] = op["params"]["value"]
+    return figure
+
+
+def render_figure(kind, args):
+    """The callback's patch applied to its chart template, i.e. what the browser ends up drawing."""
+    callback = dashboard.update_density_map if kind == "density" else getattr(dashboard, f"update_{kind}_chart")
+    patch = callback.uncached(*args).to_plotly_json()
+    return apply_patch(json.loads(template_json(kind)), patch)
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def render_batch(out_dir, batch):
+    """Render and write ``[(relative path, kind, args)]``; returns the paths written."""
+    for relpath, kind, args in batch:
+        _write(os.path.join(out_dir, relpath),
+               json.dumps(render_figure(kind, args), cls=PlotlyJSONEncoder, separators=(",", ":")))
+    return [relpath for relpath, _, _ in batch]
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, "manifest.json"), "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("outputs", {}) if manifest.get("format") == EXPORT_FORMAT else {}
+
+
+def export(out_dir="export", workers=1, batch_size=64, force=False):
+    """Bring ``out_dir`` up to date; returns (rendered, skipped, removed) counts."""
+    snapshot = dashboard.snapshots.current()
+    outputs, meta = plan_outputs(snapshot)
+    previous = {} if force else read_manifest(out_dir)
+
+    todo = [(relpath, kind, args) for relpath, (kind, args, fingerprint) in outputs.items()
+            if previous.get(relpath) != fingerprint or not os.path.exists(os.path.join(out_dir, relpath))]
+    stale = [relpath for relpath in previous if relpath not in outputs]
+    done = {relpath: fingerprint for relpath, (_, _, fingerprint) in outputs.items()
+            if previous.get(relpath) == fingerprint}
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+
+    def finished(paths):
+        for relpath in paths:
+            done[relpath] = outputs[relpath][2]
+
+    try:
+        # Workers fork with the snapshot already loaded; at most two batches each in flight
+        for paths in imap_bounded(render_batch, ((out_dir, batch) for batch in batches), workers):
+            finished(paths)
+    finally:
+        # Whatever was written is recorded, so an interrupted export resumes where it stopped
+        done = {relpath: fp for relpath, fp in done.items() if os.path.exists(os.path.join(out_dir, relpath))}
+        _write(os.path.join(out_dir, "manifest.json"),
+               json.dumps({"format": EXPORT_FORMAT, "outputs": done}, separators=(",", ":")))
+
+    for relpath in stale:
+        try:
+            os.remove(os.path.join(out_dir, relpath))
+        except OSError:
+            pass
+    _write(os.path.join(out_dir, "meta.json"), json.dumps(meta))
+    shutil.copyfile(VIEWER, os.path.join(out_dir, "index.html"))
+    shutil.copyfile(PLOTLY_JS, os.path.join(out_dir, "plotly.min.js"))
+    return len(todo), len(outputs) - len(todo), len(stale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out-dir", default="export")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=64, help="figures per pool task")
+    parser.add_argument("--force", action="store_true", help="render everything, ignoring the manifest")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rendered, skipped, removed = export(args.out_dir, args.workers, args.batch_size, args.force)
+    print(f"rendered {rendered}, unchanged {skipped}, removed {removed} "
+          f"in {time.perf_counter() - start:.1f}s -> {args.out_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
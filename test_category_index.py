@@ -0,0 +1,62 @@
+"""StateCategoryIndex against the string filter + pivot it replaced in the comparison callbacks."""
+import numpy as np
+import pytest
+
+from category_index import StateCategoryIndex
+from data_bundle import read_source
+
+DATASETS = {
+    "career": ("lot_career_area_name", "entry_count", "total_jobs"),
+    "skills": ("skills_name", "skill_count", "total_ai_listings"),
+}
+PARTNERS = ("California", "Tennessee", "Wyoming")
+
+
+@pytest.fixture(scope="module", params=sorted(DATASETS))
+def dataset(request):
+    df = read_source(request.param)
+    category_col, count_col, nobs_col = DATASETS[request.param]
+    return df, StateCategoryIndex(df, category_col, count_col, nobs_col), DATASETS[request.param]
+
+
+def baseline_pivot(df, state1, state2, category_col, count_col, nobs_col):
+    filtered = df[df["state_name"].isin([state1, state2])]
+    return filtered.pivot(index=category_col, columns="state_name", values=[count_col, nobs_col]).dropna()
+
+
+def test_shared_categories_match_pivot(dataset):
+    df, index, (category_col, count_col, nobs_col) = dataset
+    for state1 in index.states:
+        for state2 in PARTNERS + (state1,):
+            pivot = baseline_pivot(df, state1, state2, category_col, count_col, nobs_col)
+            ids = index.state_id(state1), index.state_id(state2)
+            shared = index.shared_categories(*ids)
+            assert index.categories[shared].tolist() == pivot.index.tolist(), (state1, state2)
+            for state, state_id in zip((state1, state2), ids):
+                np.testing.assert_array_equal(index.counts[state_id, shared], pivot[(count_col, state)])
+                np.testing.assert_array_equal(index.nobs[state_id, shared], pivot[(nobs_col, state)])
+
+
+def test_state_rows_keep_source_order(dataset):
+    df, index, (category_col, _, _) = dataset
+    for state, rows in df.groupby("state_name", sort=False):
+        names, proportions = index.state_rows(index.state_id(state))
+        assert names == rows[category_col].tolist()
+        np.testing.assert_array_equal(proportions, rows["proportion"].to_numpy())
+
+
+def test_unknown_state(dataset):
+    _, index, _ = dataset
+    assert index.state_id("Atlantis") == -1
+    assert index.state_rows(-1) == ([], [])
+    known = index.state_id("Texas")
+    np.testing.assert_array_equal(index.shared_categories(known, -1), index.shared_categories(known, known))
+    assert len(index.shared_categories(-1, -1)) == 0
+
+
+def test_export_restore_round_trip(dataset):
+    _, index, _ = dataset
+    restored = StateCategoryIndex.restore(*index.export())
+    np.testing.assert_array_equal(restored.counts, index.counts)
+    np.testing.assert_array_equal(restored.row_ids(5), index.row_ids(5))
+    assert restored.state_id("Texas") == index.state_id("Texas")
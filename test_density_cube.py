@@ -0,0 +1,72 @@
+"""DensityYearCube against the filter + groupby the density-map callback used to run per slider move."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_bundle import read_source
+from density_cube import DensityYearCube
+
+
+def baseline_metric(df, metric, start_year, end_year):
+    df_years = df[(df["year"] >= start_year) & (df["year"] <= end_year)]
+    state_agg = (df_years.groupby(["state_name", "state_abbrev"], as_index=False)
+                 .agg(ai_jobs_count=("ai_jobs_count", "sum"), all_jobs_state_year=("all_jobs_state_year", "sum")))
+    us_total = df_years.groupby("year")["ai_jobs_count"].sum().sum()
+    if metric == "state_share":
+        state_agg["value"] = state_agg.apply(
+            lambda r: (r["ai_jobs_count"] / r["all_jobs_state_year"]) if r["all_jobs_state_year"] > 0 else None,
+            axis=1)
+    else:
+        state_agg["value"] = state_agg["ai_jobs_count"] / us_total if us_total > 0 else None
+    return state_agg, us_total
+
+
+def assert_matches_baseline(cube, df, metric, start_year, end_year):
+    expected, expected_total = baseline_metric(df, metric, start_year, end_year)
+    got, total = cube.metric(metric, start_year, end_year)
+    assert total == expected_total
+    assert got["state_name"].tolist() == expected["state_name"].tolist()
+    assert got["state_abbrev"].tolist() == expected["state_abbrev"].tolist()
+    np.testing.assert_array_equal(got["ai_jobs_count"], expected["ai_jobs_count"])
+    np.testing.assert_array_equal(got["all_jobs_state_year"], expected["all_jobs_state_year"])
+    np.testing.assert_allclose(got["value"].to_numpy(dtype=float), expected["value"].to_numpy(dtype=float),
+                               rtol=1e-12)
+
+
+@pytest.fixture(scope="module")
+def density():
+    df = read_source("density")
+    return df, DensityYearCube(df)
+
+
+@pytest.mark.parametrize("metric", ["state_share", "national_share"])
+def test_every_year_range_matches_groupby(density, metric):
+    df, cube = density
+    for start_year in cube.years:
+        for end_year in cube.years:
+            if end_year >= start_year:
+                assert_matches_baseline(cube, df, metric, start_year, end_year)
+
+
+def test_ranges_outside_the_data(density):
+    df, cube = density
+    got, total = cube.metric("national_share", cube.min_year - 10, cube.min_year - 1)
+    assert got.empty and total == 0
+    # A range that overhangs the data is clamped to it
+    assert_matches_baseline(cube, df, "state_share", cube.min_year - 3, cube.max_year + 3)
+
+
+def test_unmappable_rows_count_toward_us_total():
+    df = pd.DataFrame({
+        "state_name": ["A", "A", "B", "Guam"],
+        "state_abbrev": ["AA", "AA", "BB", None],
+        "year": [2020, 2021, 2021, 2021],
+        "ai_jobs_count": [1, 2, 3, 4],
+        "all_jobs_state_year": [10, 0, 0, 8],
+    })
+    cube = DensityYearCube(df)
+    for metric in ("state_share", "national_share"):
+        for start_year, end_year in ((2020, 2021), (2021, 2021), (2020, 2020)):
+            assert_matches_baseline(cube, df, metric, start_year, end_year)
+    got, _ = cube.metric("state_share", 2021, 2021)
+    assert np.isnan(got["value"]).all()
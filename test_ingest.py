@@ -0,0 +1,93 @@
+"""Raw postings → the dashboard's three tables."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+from category_index import OTHER_CATEGORY
+from data_bundle import TABLES
+
+
+def postings():
+    """Deterministic raw extract: Texas has more career areas than the top N, Utah fewer."""
+    rows = []
+    careers = {"Texas": {"IT": 6, "Finance": 4, "Sales": 3, "Legal": 3, "Health": 1, "Art": 1},
+               "Utah": {"IT": 2, "Sales": 1}}
+    for state, counts in careers.items():
+        for career, n in counts.items():
+            for i in range(n):
+                rows.append({"state_name": state, "year": 2020 + i % 2, "lot_career_area_name": career,
+                             "skills_name": "Python; SQL" if i % 2 else "Python", "is_ai": "yes"})
+    # Non-AI postings only count toward all jobs; rows without a year are dropped
+    rows += [{"state_name": "Texas", "year": 2021, "lot_career_area_name": "IT", "skills_name": "Excel",
+              "is_ai": "0"}] * 5
+    rows.append({"state_name": "Utah", "year": None, "lot_career_area_name": "IT", "skills_name": "Python",
+                 "is_ai": "1"})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="module")
+def raw_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("raw") / "postings.csv"
+    postings().to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def tables(raw_path):
+    return ingest.finalize(ingest.aggregate_file(raw_path, chunksize=7), top_careers=3, top_skills=10)
+
+
+def test_schema_matches_the_shipped_csvs(tables):
+    for name, df in tables.items():
+        shipped = pd.read_csv(TABLES[name]["source"], nrows=0)
+        assert df.columns.tolist() == shipped.columns.tolist(), name
+
+
+def test_density_counts(tables):
+    density = tables["density"].set_index(["state_name", "year"])
+    # Odd-numbered AI postings fall in 2021: 3 + 2 + 1 + 1 for Texas, plus 5 non-AI postings
+    assert density.loc[("Texas", 2021), "ai_jobs_count"] == 7
+    assert density.loc[("Texas", 2021), "all_jobs_state_year"] == 7 + 5
+    assert density.loc[("Utah", 2020), "ai_jobs_count"] == 2
+    np.testing.assert_allclose(tables["density"].groupby("year")["percent"].sum(), 100.0)
+
+
+def test_top_n_with_other_rollup(tables):
+    career = tables["career"]
+    texas = career[career["state_name"] == "Texas"]
+    # Top 3 with the tie at the cut kept (Sales and Legal both have 3), then one "Other" row
+    assert texas["lot_career_area_name"].tolist() == ["IT", "Finance", "Legal", "Sales", OTHER_CATEGORY]
+    assert texas["entry_count"].tolist() == [6, 4, 3, 3, 2]
+    assert (texas["total_jobs"] == 18).all()
+    np.testing.assert_allclose(texas["proportion"].sum(), 1.0)
+    # Nothing outside the top N: no "Other" row
+    utah = career[career["state_name"] == "Utah"]
+    assert OTHER_CATEGORY not in utah["lot_career_area_name"].tolist()
+    assert utah["entry_count"].tolist() == [2, 1]
+
+
+def test_skills_are_per_mention(tables):
+    skills = tables["skills"].set_index(["state_name", "skills_name"])
+    assert skills.loc[("Texas", "Python"), "skill_count"] == 18
+    # Every Texas AI posting mentions Python, the 7 odd-numbered ones SQL too
+    assert skills.loc[("Texas", "SQL"), "skill_count"] == 7
+    assert skills.loc[("Texas", "SQL"), "total_ai_listings"] == 18 + 7
+    assert ("Texas", "Excel") not in skills.index
+
+
+def test_chunked_and_pooled_runs_agree(raw_path, tables):
+    for chunksize, workers in ((1_000, 1), (5, 2)):
+        other = ingest.finalize(ingest.aggregate_file(raw_path, chunksize=chunksize, workers=workers),
+                                top_careers=3, top_skills=10)
+        for name in tables:
+            pd.testing.assert_frame_equal(other[name], tables[name])
+
+
+def test_write_tables_round_trip(tables, tmp_path):
+    ingest.write_tables(tables, str(tmp_path))
+    for name, df in tables.items():
+        written = pd.read_csv(os.path.join(tmp_path, TABLES[name]["source"]))
+        pd.testing.assert_frame_equal(written, df, check_dtype=False)
@@ -0,0 +1,28 @@
+"""Stored and bootstrap confidence intervals for the comparison error bars."""
+import numpy as np
+
+from proportion_intervals import bootstrap_interval
+from proportion_stats import wilson_interval
+
+COUNTS = np.array([[5, np.nan, 0, 12], [10, 3, 20, 7]])
+NOBS = np.array([[20, 10, 10, 40], [40, 30, 20, 35]])
+
+
+def test_bootstrap_does_not_depend_on_workers():
+    serial = bootstrap_interval(COUNTS, NOBS, n_resamples=500, chunk_cells=3, workers=1)
+    pooled = bootstrap_interval(COUNTS, NOBS, n_resamples=500, chunk_cells=3, workers=3)
+    for a, b in zip(serial, pooled):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_bootstrap_bounds_bracket_the_proportion():
+    lower, upper = bootstrap_interval(COUNTS, NOBS, n_resamples=2000, chunk_cells=2)
+    assert lower.shape == upper.shape == COUNTS.shape
+    p = COUNTS / NOBS
+    ok = np.isfinite(p)
+    assert (lower[ok] <= p[ok]).all() and (p[ok] <= upper[ok]).all()
+    # Missing cells stay NaN; 0% and 100% cells fall back to Wilson bounds
+    assert np.isnan(lower[0, 1]) and np.isnan(upper[0, 1])
+    wilson_lower, wilson_upper = wilson_interval(COUNTS, NOBS)
+    for cell in ((0, 2), (1, 2)):
+        assert (lower[cell], upper[cell]) == (wilson_lower[cell], wilson_upper[cell])
@@ -0,0 +1,154 @@
+"""Pin the hand-written statistics in proportion_stats.py to reference values.
+
+The expected numbers come from scipy 1.17 (``scipy.special.erfc``,
+``scipy.stats.chi2.sf``, ``scipy.stats.norm``) and statsmodels 0.15
+(``proportions_ztest``, ``proportions_chisquare``, ``proportion_confint(...,
+method="wilson")``), run once offline; neither is needed to run these tests.
+"""
+import numpy as np
+import pytest
+
+from proportion_stats import (PairwisePValues, chi2_sf, erfc, k_sample_chi2, normal_quantile, pairwise_pvalues,
+                              two_proportion_ztest, two_sided_pvalue, wilson_interval)
+
+# erfc is a rational approximation with fractional error < 1.2e-7; everything built on it inherits that
+RTOL = 2e-7
+
+
+def test_erfc_matches_scipy():
+    x = [0.0, 0.5, 1.0, -1.0, 3.0, 5.0, -5.0]
+    expected = [1.0, 0.4795001221869535, 0.15729920705028516, 1.8427007929497148,
+                2.2090496998585445e-05, 1.5374597944280347e-12, 1.9999999999984626]
+    np.testing.assert_allclose(erfc(x), expected, rtol=RTOL)
+
+
+def test_two_sided_pvalue_tiny_tail():
+    # 2 * norm.sf(8)
+    np.testing.assert_allclose(two_sided_pvalue(8.0), 1.244192114854348e-15, rtol=RTOL)
+    assert two_sided_pvalue(0.0) == 1.0
+
+
+@pytest.mark.parametrize("count1, nobs1, count2, nobs2, z, p", [
+    (15, 50, 25, 50, -2.041241452319315, 0.041226833337163676),
+    (0, 40, 3, 60, -1.4359163172354763, 0.15102615479062906),
+    (480, 1000, 520, 1000, -1.7888543819998333, 0.0736382701203024),
+    (40, 100, 10, 100, 4.898979485566356, 9.633570086430965e-07),
+    # Identical proportions
+    (7, 20, 7, 20, 0.0, 1.0),
+])
+def test_two_proportion_ztest_matches_statsmodels(count1, nobs1, count2, nobs2, z, p):
+    z_out, p_out = two_proportion_ztest(count1, nobs1, count2, nobs2)
+    np.testing.assert_allclose(z_out, z, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(p_out, p, rtol=RTOL, atol=1e-15)
+
+
+def test_two_proportion_ztest_far_tail_underflows_to_zero():
+    z, p = two_proportion_ztest(1, 1000, 1000, 1000)
+    np.testing.assert_allclose(z, -44.676660528781646, rtol=1e-12)
+    assert p == 0.0
+
+
+@pytest.mark.parametrize("count1, nobs1, count2, nobs2", [
+    (0, 10, 0, 10),    # p = 0 on both sides: zero pooled variance
+    (10, 10, 10, 10),  # p = 1 on both sides
+    (3, 0, 5, 10),     # empty sample
+    (np.nan, 10, 5, 10),
+])
+def test_two_proportion_ztest_undefined_is_nan(count1, nobs1, count2, nobs2):
+    z, p = two_proportion_ztest(count1, nobs1, count2, nobs2)
+    assert np.isnan(z) and np.isnan(p)
+
+
+def test_pairwise_pvalues_tensor():
+    counts = np.array([[15, 0], [25, 3], [15, np.nan]])
+    nobs = np.array([[50, 40], [50, 60], [50, 40]])
+    p = pairwise_pvalues(counts, nobs)
+    assert p.shape == (3, 3, 2)
+    np.testing.assert_allclose(p[0, 1], [0.041226833337163676, 0.15102615479062906], rtol=RTOL)
+    np.testing.assert_array_equal(p, p.transpose(1, 0, 2))
+    # Identical proportions in different states are a real test
+    assert p[0, 2, 0] == 1.0
+    # A state against itself is not: NaN ("n/a"), like the baseline chart
+    assert np.isnan(p[np.arange(3), np.arange(3)]).all()
+    # A missing category is NaN against every state
+    assert np.isnan(p[2, :, 1]).all()
+
+
+def test_lookup_ids():
+    pvalues = PairwisePValues(["A", "B"], ["x", "y"],
+                              pairwise_pvalues([[15, 0], [25, 3]], [[50, 40], [50, 60]]))
+    np.testing.assert_allclose(pvalues.lookup_ids(0, 1, [1, -1, 0]),
+                               [0.15102615479062906, np.nan, 0.041226833337163676], rtol=RTOL)
+    assert np.isnan(pvalues.lookup_ids(1, 1, [0, 1])).all()
+    assert np.isnan(pvalues.lookup_ids(-1, 0, [0, 1])).all()
+
+
+@pytest.mark.parametrize("x, df, expected", [
+    (0.0, 1, 1.0),
+    (1.0, 1, 0.31731050786291115),
+    (3.84, 1, 0.05004352124870519),
+    (5.0, 2, 0.0820849986238988),
+    (7.8, 3, 0.050331097859853326),
+    (10.0, 4, 0.04042768199451279),
+    (20.0, 7, 0.005569683072945574),
+    # Tiny tails, even and odd df
+    (80.0, 2, 4.248354255291595e-18),
+    (60.0, 5, 1.2154569777183007e-11),
+    (200.0, 3, 4.218541107192018e-43),
+    (700.0, 3, 2.0991308534204487e-151),
+])
+def test_chi2_sf_matches_scipy(x, df, expected):
+    np.testing.assert_allclose(chi2_sf(x, df), expected, rtol=RTOL)
+
+
+def test_chi2_sf_edges():
+    assert chi2_sf(1500.0, 1) == 0.0 and chi2_sf(1500.0, 2) == 0.0
+    assert np.isnan(chi2_sf(3.0, 0)) and np.isnan(chi2_sf(np.nan, 2)) and np.isnan(chi2_sf(np.inf, 2))
+    # Broadcasts over an array of statistics and degrees of freedom
+    np.testing.assert_allclose(chi2_sf([1.0, 5.0], [1, 2]), [0.31731050786291115, 0.0820849986238988],
+                               rtol=RTOL)
+
+
+def test_k_sample_chi2_matches_statsmodels():
+    # States × categories; the third category has identical proportions
+    counts = np.array([[15, 0, 7], [25, 3, 7], [40, 5, 7]])
+    nobs = np.array([[50, 40, 20], [50, 60, 20], [80, 50, 20]])
+    stat, dof, p = k_sample_chi2(counts, nobs)
+    np.testing.assert_allclose(stat, [5.849999999999998, 4.423415492957748, 0.0], rtol=1e-12, atol=1e-12)
+    np.testing.assert_array_equal(dof, [2, 2, 2])
+    np.testing.assert_allclose(p, [0.05366469191273017, 0.10951346749363552, 1.0], rtol=RTOL)
+
+
+def test_k_sample_chi2_skips_missing_states():
+    counts = np.array([[15, np.nan, 0], [25, 3, 0]])
+    nobs = np.array([[50, 40, 30], [50, 60, 30]])
+    stat, dof, p = k_sample_chi2(counts, nobs)
+    # Two states: the same test as the two-proportion z-test (stat == z²)
+    np.testing.assert_allclose(stat[0], 2.041241452319315 ** 2, rtol=1e-12)
+    np.testing.assert_allclose(p[0], 0.041226833337163676, rtol=RTOL)
+    # One state left, or all-zero counts: undefined
+    assert dof[1] == 0 and np.isnan(stat[1]) and np.isnan(p[1])
+    assert np.isnan(stat[2]) and np.isnan(p[2])
+
+
+@pytest.mark.parametrize("confidence, expected", [
+    (0.90, 1.6448536269514722),
+    (0.95, 1.959963984540054),
+    (0.99, 2.5758293035489004),
+    (0.999, 3.2905267314919255),
+])
+def test_normal_quantile_matches_scipy(confidence, expected):
+    np.testing.assert_allclose(normal_quantile(confidence), expected, rtol=RTOL)
+
+
+def test_wilson_interval_matches_statsmodels():
+    lower, upper = wilson_interval([0, 20, 5, 1, 500], [20, 20, 20, 3, 1000])
+    np.testing.assert_allclose(lower, [0.0, 0.8388748419471804, 0.11186170140766563,
+                                       0.06149194472039626, 0.4690696003681042], rtol=RTOL, atol=1e-12)
+    np.testing.assert_allclose(upper, [0.1611251580528194, 1.0, 0.4687008776187441,
+                                       0.7923403991979523, 0.5309303996318958], rtol=RTOL)
+
+
+def test_wilson_interval_undefined_is_nan():
+    lower, upper = wilson_interval([3, np.nan], [0, 10])
+    assert np.isnan(lower).all() and np.isnan(upper).all()
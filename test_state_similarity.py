@@ -0,0 +1,42 @@
+"""Similar-states profiles and neighbor ranking."""
+import numpy as np
+import pandas as pd
+
+from category_index import StateCategoryIndex
+from state_similarity import StateSimilarity, profiles
+
+
+def make_index(rows):
+    df = pd.DataFrame(rows, columns=["state_name", "skills_name", "skill_count", "total_ai_listings"])
+    df["proportion"] = df["skill_count"] / df["total_ai_listings"]
+    return StateCategoryIndex(df, "skills_name", "skill_count", "total_ai_listings")
+
+
+# A and B share a top-N profile and differ only in their "Other" rollup; C has another profile
+ROWS = [
+    ("A", "Python", 30, 100), ("A", "SQL", 20, 100), ("A", "Other", 50, 100),
+    ("B", "Python", 6, 100), ("B", "SQL", 4, 100), ("B", "Other", 90, 100),
+    ("C", "Python", 5, 100), ("C", "SQL", 45, 100), ("C", "Other", 50, 100),
+]
+
+
+def test_profiles_drop_other_and_renormalize():
+    index = make_index(ROWS)
+    matrix = profiles(index)
+    other = index.categories == "Other"
+    assert (matrix[:, other] == 0).all()
+    np.testing.assert_allclose(matrix.sum(axis=1), 1.0)
+    np.testing.assert_allclose(matrix[0, ~other], [0.6, 0.4])
+
+
+def test_other_does_not_drive_neighbors():
+    similarity = StateSimilarity(make_index(ROWS))
+    for method in ("jensen_shannon", "cosine"):
+        (nearest, score), _ = similarity.neighbors("A", k=2, method=method)
+        assert nearest == "B"
+        np.testing.assert_allclose(score, 1.0)
+
+
+def test_state_with_only_other_has_an_empty_profile():
+    index = make_index(ROWS + [("D", "Other", 10, 10)])
+    assert (profiles(index)[index.state_id("D")] == 0).all()